@@ -1,109 +1,214 @@
+import argparse
+import multiprocessing
 import neat
+import numpy as np
 import os
-import pickle
-from flappy_bird import Game, Bird, Pipe
-
-def eval_genomes(genomes, config):
-    nets = []
-    birds = []
-    games = []
-
-    for genome_id, genome in genomes:
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
-        nets.append(net)
-        birds.append(Bird(200, 300))
-        games.append(Game())
-        genome.fitness = 0
-
-    while len(birds) > 0:
-        for i, bird in enumerate(birds):
-            # Get the closest pipe
-            closest_pipe = None
-            min_distance = float('inf')
-            for pipe in games[i].pipes:
-                distance = pipe.x - bird.x
-                if 0 < distance < min_distance:
-                    min_distance = distance
-                    closest_pipe = pipe
-
-            # Prepare inputs for the neural network
-            if closest_pipe:
-                inputs = [
-                    bird.y / 600,  # Normalized bird height
-                    closest_pipe.gap_y / 600,  # Normalized gap center
-                    (closest_pipe.x - bird.x) / 400,  # Normalized distance to pipe
-                    bird.velocity / 10  # Normalized velocity
-                ]
-            else:
-                inputs = [bird.y / 600, 0.5, 1, bird.velocity / 10]
-
-            # Get output from neural network
-            output = nets[i].activate(inputs)
-            
-            # Flap if output is greater than 0.5
-            if output[0] > 0.5:
-                bird.flap()
-
-            # Update game state
-            games[i].update()
-            
-            # Increase fitness for surviving
-            genomes[i][1].fitness += 0.1
-
-            # Check if bird passed a pipe
-            for pipe in games[i].pipes:
-                if not pipe.passed and pipe.x < bird.x:
-                    pipe.passed = True
-                    genomes[i][1].fitness += 1.0
-
-            # Check if bird is dead
-            if (bird.y < 0 or bird.y > 600 or
-                any(bird.rect.colliderect(pipe.top_rect) or 
-                    bird.rect.colliderect(pipe.bottom_rect) 
-                    for pipe in games[i].pipes)):
-                nets.pop(i)
-                birds.pop(i)
-                games.pop(i)
-                genomes.pop(i)
-                break
-
-def run_neat(config_path):
+import random
+import checkpoint
+from batched_network import BatchedNetwork
+from flappy_bird import Game, FPS
+from profiling import NULL_PROFILER, PhaseProfiler, ProfilingReporter
+from replay import EpisodeLog, TraceRecorder
+from simulation import PopulationSimulator
+
+# Cap on frames per generation so a perfect bird can't stall training
+MAX_FRAMES = 20000
+
+# Base seed for the pipe courses; each genome flies the course seeded by its
+# id, so its fitness doesn't depend on how the population is split up
+COURSE_SEED = 0
+
+def genome_seed(genome_id):
+    return COURSE_SEED * 2**32 + genome_id
+
+def evaluate_fitness(genomes, config, course_seeds=None, profiler=NULL_PROFILER, episodes=None):
+    """
+    Simulate a list of (genome_id, genome) and return their fitnesses.
+
+    course_seeds: if given, every genome flies each of these shared courses
+                  and its fitness is the mean over them; otherwise each genome
+                  flies its own course seeded by its id.
+    profiler: a profiling.PhaseProfiler recording where the time goes.
+    episodes: if given, a list that every bird's episode trace is appended to
+              (see replay.EpisodeLog).
+    """
+    with profiler.phase("compile"):
+        nets = BatchedNetwork.create(genomes, config)
+
+    def policy(inputs, alive_idx):
+        # Flap if output is greater than 0.5
+        return nets.activate(inputs, alive_idx)[:, 0] > 0.5
+
+    genome_ids = [gid for gid, _ in genomes]
+
+    def simulate(episode_seeds, **kwargs):
+        # Simulate all the birds at once, headless
+        sim = PopulationSimulator(len(genomes), profiler=profiler, **kwargs)
+        recorder = TraceRecorder() if episodes is not None else None
+        fitnesses = sim.run(policy, max_frames=MAX_FRAMES, recorder=recorder)
+        if recorder:
+            episodes.extend(recorder.episodes(genome_ids, episode_seeds, fitnesses))
+        return fitnesses
+
+    if course_seeds is None:
+        seeds = [genome_seed(gid) for gid in genome_ids]
+        return [float(fitness) for fitness in simulate(seeds, seeds=seeds)]
+
+    total = np.zeros(len(genomes))
+    for seed in course_seeds:
+        total += simulate([seed] * len(genomes), course_seed=seed)
+    return [float(fitness) for fitness in total / len(course_seeds)]
+
+def eval_genome(genome, config, course_seeds=None):
+    """Per-genome fitness function, e.g. for neat.ParallelEvaluator."""
+    return evaluate_fitness([(genome.key, genome)], config, course_seeds)[0]
+
+def eval_genomes(genomes, config, course_seeds=None, profiler=NULL_PROFILER, episode_log=None):
+    episodes = [] if episode_log else None
+    fitnesses = evaluate_fitness(genomes, config, course_seeds, profiler, episodes)
+    for (genome_id, genome), fitness in zip(genomes, fitnesses):
+        genome.fitness = fitness
+    if episode_log:
+        episode_log.append(episodes)
+
+# Set once in each worker process by _init_worker
+_worker_config = None
+
+def _init_worker(config):
+    global _worker_config
+    _worker_config = config
+
+def _eval_chunk(args):
+    genomes, course_seeds, profile, record = args
+    profiler = PhaseProfiler() if profile else NULL_PROFILER
+    episodes = [] if record else None
+    fitnesses = evaluate_fitness(genomes, _worker_config, course_seeds, profiler, episodes)
+    return fitnesses, profiler.snapshot() if profile else None, episodes
+
+class ParallelEvaluator:
+    """
+    Evaluates a generation on a pool of worker processes.
+
+    The population is split into chunks that are simulated vectorized in the
+    workers. Courses are seeded per genome, so the fitnesses are identical to
+    a serial eval_genomes run. Profiled phase times are summed over workers.
+    """
+
+    def __init__(self, num_workers, config):
+        self.num_workers = num_workers
+        self.pool = multiprocessing.Pool(num_workers, initializer=_init_worker,
+                                         initargs=(config,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def evaluate(self, genomes, config, course_seeds=None, profiler=NULL_PROFILER,
+                 episode_log=None):
+        # A few chunks per worker evens out birds dying at different times
+        n_chunks = min(len(genomes), self.num_workers * 4)
+        chunks = [genomes[i::n_chunks] for i in range(n_chunks)]
+        tasks = [(chunk, course_seeds, profiler.enabled, episode_log is not None)
+                 for chunk in chunks]
+        results = self.pool.map(_eval_chunk, tasks)
+        for chunk, (fitnesses, profile, episodes) in zip(chunks, results):
+            for (genome_id, genome), fitness in zip(chunk, fitnesses):
+                genome.fitness = fitness
+            if profile:
+                profiler.merge(profile)
+            # Episodes are written by this process only, in chunk order
+            if episode_log:
+                episode_log.append(episodes)
+
+# Generations per training run
+GENERATIONS = 50
+
+def run_neat(config_path, workers=1, shared_course=False, course_seeds=None,
+             checkpoint_dir="checkpoints", checkpoint_interval=5, resume=True,
+             profile_dir=None, record_path=None):
+    """
+    workers: number of evaluation processes; 1 evaluates serially in this
+             process, 0 uses every CPU core.
+    shared_course: evaluate each generation on one course shared by all
+                   genomes, drawn fresh every generation.
+    course_seeds: evaluate every generation on this fixed list of shared
+                  courses (implies shared_course).
+    checkpoint_dir, checkpoint_interval: save the full population there
+                  every that many generations (0 disables checkpoints).
+    resume: continue from the latest checkpoint in checkpoint_dir, if any.
+    profile_dir: if given, write per-phase timings of every generation there.
+    record_path: if given, append every evaluated episode to this replay store.
+    """
     config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
                         neat.DefaultSpeciesSet, neat.DefaultStagnation,
                         config_path)
 
-    pop = neat.Population(config)
+    latest = checkpoint.latest_checkpoint(checkpoint_dir) if resume else None
+    if latest:
+        print(f"Resuming from {latest}")
+        pop = checkpoint.restore_population(latest, config)
+    else:
+        pop = neat.Population(config)
+    profiler = NULL_PROFILER
+    if profile_dir:
+        profiler = PhaseProfiler()
+        pop.add_reporter(ProfilingReporter(profiler, profile_dir))
+    episode_log = None
+    if record_path:
+        episode_log = EpisodeLog(record_path)
+        pop.add_reporter(episode_log)
+    checkpointer = checkpoint.Checkpointer(checkpoint_dir, checkpoint_interval)
+    checkpointer.best_genome = pop.best_genome
+    pop.add_reporter(checkpointer)
     pop.add_reporter(neat.StdOutReporter(True))
     stats = neat.StatisticsReporter()
     pop.add_reporter(stats)
 
-    winner = pop.run(eval_genomes, 50)
+    workers = workers or multiprocessing.cpu_count()
+    evaluator = ParallelEvaluator(workers, config) if workers > 1 else None
+    evaluate = evaluator.evaluate if evaluator else eval_genomes
+
+    def fitness_function(genomes, config):
+        seeds = course_seeds
+        if seeds is None and shared_course:
+            seeds = [random.randrange(2**32)]
+        evaluate(genomes, config, seeds, profiler, episode_log)
+
+    try:
+        winner = pop.run(fitness_function, max(GENERATIONS - pop.generation, 0))
+    finally:
+        if evaluator:
+            evaluator.close()
+        if episode_log:
+            episode_log.close()
     
     # Save the best genome
-    with open("best_bird.pickle", "wb") as f:
-        pickle.dump(winner, f)
+    if winner is not None:
+        checkpoint.export_best(winner, config, "best_bird.pickle", pop.generation)
 
-def play_best_bird(config_path):
-    with open("best_bird.pickle", "rb") as f:
-        genome = pickle.load(f)
+def play_best_bird(config_path=None, path="best_bird.pickle"):
+    best = checkpoint.load(path)
+    if isinstance(best, dict):
+        # Exported with its compiled network, no config needed
+        net = BatchedNetwork([best["net"]])
+    else:
+        # A bare pickled genome
+        config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                            neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                            config_path)
+        net = BatchedNetwork.create([(best.key, best)], config)
 
-    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
-                        neat.DefaultSpeciesSet, neat.DefaultStagnation,
-                        config_path)
-    
-    net = neat.nn.FeedForwardNetwork.create(genome, config)
     game = Game()
-    bird = Bird(200, 300)
 
     while True:
+        # Keep the window responsive (close to quit, R to restart)
+        game.handle_events()
+        bird = game.bird
+
         # Get the closest pipe
-        closest_pipe = None
-        min_distance = float('inf')
-        for pipe in game.pipes:
-            distance = pipe.x - bird.x
-            if 0 < distance < min_distance:
-                min_distance = distance
-                closest_pipe = pipe
+        closest_pipe = game.pipe_ahead()
 
         # Prepare inputs for the neural network
         if closest_pipe:
@@ -117,7 +222,7 @@ def play_best_bird(config_path):
             inputs = [bird.y / 600, 0.5, 1, bird.velocity / 10]
 
         # Get output from neural network
-        output = net.activate(inputs)
+        output = net.activate([inputs])[0]
         
         # Flap if output is greater than 0.5
         if output[0] > 0.5:
@@ -126,8 +231,31 @@ def play_best_bird(config_path):
         # Update game state
         game.update()
         game.draw()
+        game.clock.tick(FPS)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a Flappy Bird AI with NEAT")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="evaluation processes (0 = all CPU cores)")
+    parser.add_argument("--shared-course", action="store_true",
+                        help="fly every genome of a generation on the same course")
+    parser.add_argument("--course-seeds", type=int, nargs="+",
+                        help="fixed shared courses to evaluate every generation on")
+    parser.add_argument("--checkpoint-dir", default="checkpoints",
+                        help="where population checkpoints are written")
+    parser.add_argument("--checkpoint-interval", type=int, default=5,
+                        help="generations between checkpoints (0 = never)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="start from scratch even if a checkpoint exists")
+    parser.add_argument("--profile-dir",
+                        help="write per-generation phase timings (CSV/JSON) here")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record every episode for replay.py to PATH.bin/.idx")
+    args = parser.parse_args()
+
     local_dir = os.path.dirname(__file__)
     config_path = os.path.join(local_dir, "config.txt")
-    run_neat(config_path) 
\ No newline at end of file
+    run_neat(config_path, workers=args.workers, shared_course=args.shared_course,
+             course_seeds=args.course_seeds, checkpoint_dir=args.checkpoint_dir,
+             checkpoint_interval=args.checkpoint_interval, resume=not args.no_resume,
+             profile_dir=args.profile_dir, record_path=args.record) 
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Batched evaluation of a whole generation of NEAT feed-forward networks.
+
+`BatchedNetwork` compiles the genomes of a generation into padded, layered
+NumPy arrays so that one call evaluates the inputs of every live bird,
+instead of one pure-Python `FeedForwardNetwork.activate` graph walk per bird.
+
+Every genome gets a row of value slots: its inputs first, then one slot per
+evaluated node, then a slot that always holds 0 (padding sources read it)
+and a scratch slot (padding nodes write it). Nodes are grouped by depth, so
+all nodes of a layer are computed together for all genomes.
+"""
+import numpy as np
+import neat
+
+
+class BatchedNetwork:
+    def __init__(self, nets):
+        """
+        nets: list of neat.nn.FeedForwardNetwork using sum aggregation and
+              tanh activation.
+        """
+        tanh = neat.activations.tanh_activation
+        total = neat.aggregations.sum_aggregation
+
+        self.n_nets = len(nets)
+        self.n_inputs = len(nets[0].input_nodes) if nets else 0
+        self.n_outputs = len(nets[0].output_nodes) if nets else 0
+
+        # Assign value slots and depths per network
+        slot_maps = []
+        layered = []
+        for net in nets:
+            slot = {key: i for i, key in enumerate(net.input_nodes)}
+            depth = {key: 0 for key in net.input_nodes}
+            layers = []
+            for node, act_func, agg_func, bias, response, links in net.node_evals:
+                if act_func is not tanh or agg_func is not total:
+                    raise ValueError("BatchedNetwork only supports sum aggregation with tanh activation")
+                d = 1 + max((depth[i] for i, _ in links), default=0)
+                depth[node] = d
+                slot[node] = len(slot)
+                while len(layers) < d:
+                    layers.append([])
+                layers[d - 1].append((node, bias, response, links))
+            # Outputs that are never evaluated keep their initial value of 0
+            for key in net.output_nodes:
+                slot.setdefault(key, len(slot))
+            slot_maps.append(slot)
+            layered.append(layers)
+
+        n_slots = max((len(slot) for slot in slot_maps), default=self.n_inputs)
+        self.zero_slot = n_slots
+        self.scratch_slot = n_slots + 1
+        self.n_slots = n_slots + 2
+
+        self.output_slots = np.array([[slot[key] for key in net.output_nodes]
+                                      for net, slot in zip(nets, slot_maps)], dtype=np.intp)
+        self.output_slots = self.output_slots.reshape(self.n_nets, self.n_outputs)
+
+        # Pad every layer to the widest layer and the largest fan-in
+        self.layers = []
+        n_layers = max((len(layers) for layers in layered), default=0)
+        for d in range(n_layers):
+            width = max(len(layers[d]) if d < len(layers) else 0 for layers in layered)
+            fan_in = max((len(links) for layers in layered if d < len(layers)
+                          for _, _, _, links in layers[d]), default=0)
+            targets = np.full((self.n_nets, width), self.scratch_slot, dtype=np.intp)
+            sources = np.full((self.n_nets, width, fan_in), self.zero_slot, dtype=np.intp)
+            weights = np.zeros((self.n_nets, width, fan_in))
+            biases = np.zeros((self.n_nets, width))
+            responses = np.zeros((self.n_nets, width))
+            for g, (layers, slot) in enumerate(zip(layered, slot_maps)):
+                if d >= len(layers):
+                    continue
+                for k, (node, bias, response, links) in enumerate(layers[d]):
+                    targets[g, k] = slot[node]
+                    biases[g, k] = bias
+                    responses[g, k] = response
+                    for j, (i, w) in enumerate(links):
+                        sources[g, k, j] = slot[i]
+                        weights[g, k, j] = w
+            self.layers.append((targets, sources, weights, biases, responses))
+
+    @classmethod
+    def create(cls, genomes, config):
+        """Compile a list of (genome_id, genome) pairs."""
+        return cls([neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes])
+
+    def activate(self, inputs, rows=None):
+        """
+        Evaluate a batch of inputs.
+
+        inputs: array of shape (m, n_inputs)
+        rows: indices of the networks that get each input row; defaults to
+              all networks in order.
+        Returns an array of shape (m, n_outputs).
+        """
+        if rows is None:
+            rows = np.arange(self.n_nets)
+        rows = np.asarray(rows, dtype=np.intp)
+        m = len(rows)
+        batch = np.arange(m)[:, None]
+
+        values = np.zeros((m, self.n_slots))
+        values[:, :self.n_inputs] = inputs
+        for targets, sources, weights, biases, responses in self.layers:
+            src = sources[rows]
+            w = weights[rows]
+            # Accumulate links in order, like sum() in activate()
+            s = np.zeros(src.shape[:2])
+            for j in range(src.shape[2]):
+                s = s + values[batch, src[:, :, j]] * w[:, :, j]
+            z = biases[rows] + responses[rows] * s
+            values[batch, targets[rows]] = np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+        return values[batch, self.output_slots[rows]]
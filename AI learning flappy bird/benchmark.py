@@ -0,0 +1,209 @@
+"""
+Training throughput benchmarks for the Flappy Bird agent.
+
+Runs fixed-seed, headless workloads at several population sizes:
+
+- physics:    simulator frames/sec with a fixed hand-written controller,
+              no networks involved
+- activation: BatchedNetwork activations/sec on mutated genomes
+- generation: full NEAT generations/sec (evaluation + reproduction)
+
+Every workload is repeated and reported as median, standard deviation and
+min/max, plus the peak RSS of the process that ran it (each workload runs in
+a fresh process). Results can be saved as a baseline and later runs compared
+against it, so regressions show up in the comparison report.
+
+    python benchmark.py --save-baseline baseline.json
+    python benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+
+import numpy as np
+import neat
+
+import ai_agent
+from batched_network import BatchedNetwork
+from flappy_bird import SCREEN_HEIGHT
+from simulation import PopulationSimulator
+
+SIZES = [50, 500, 5000]
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.txt")
+
+
+def load_config(pop_size):
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                         neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                         CONFIG_PATH)
+    config.pop_size = pop_size
+    # Never stop early, every run must do the same amount of work
+    config.fitness_threshold = float("inf")
+    return config
+
+
+def mutated_genomes(config, n_mutations=10):
+    """A seeded population whose genomes have grown some hidden structure."""
+    pop = neat.Population(config)
+    genomes = list(pop.population.items())
+    for _, genome in genomes:
+        for _ in range(n_mutations):
+            genome.mutate(config.genome_config)
+    return genomes
+
+
+def bench_physics(n, frames=2000):
+    """Returns (seconds, units) where units are simulated frames."""
+    sim = PopulationSimulator(n, seeds=range(n))
+    # Birds aim at slightly different heights around the gap, so the
+    # population thins out over time like a real generation
+    offsets = np.linspace(0, 60, n)
+
+    start = time.perf_counter()
+    while sim.alive.any() and sim.frame < frames:
+        obs = sim.observations()
+        flap = (obs[:, 0] * SCREEN_HEIGHT > obs[:, 1] * SCREEN_HEIGHT + offsets) & (obs[:, 3] > 0)
+        sim.step(flap)
+    return time.perf_counter() - start, sim.frame
+
+
+def bench_activation(n, calls=200):
+    """Returns (seconds, units) where units are network activations."""
+    random.seed(0)
+    config = load_config(n)
+    nets = BatchedNetwork.create(mutated_genomes(config), config)
+    inputs = np.random.default_rng(0).random((n, 4))
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        nets.activate(inputs)
+    return time.perf_counter() - start, n * calls
+
+
+def bench_generation(n, generations=3):
+    """Returns (seconds, units) where units are NEAT generations."""
+    random.seed(0)
+    config = load_config(n)
+    pop = neat.Population(config)
+
+    start = time.perf_counter()
+    pop.run(ai_agent.eval_genomes, generations)
+    return time.perf_counter() - start, generations
+
+
+WORKLOADS = {
+    "physics": (bench_physics, "frames/s"),
+    "activation": (bench_activation, "activations/s"),
+    "generation": (bench_generation, "generations/s"),
+}
+
+
+def _run_in_child(workload, n, repeat, queue):
+    func = WORKLOADS[workload][0]
+    rates = []
+    for _ in range(repeat):
+        seconds, units = func(n)
+        rates.append(units / seconds)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    queue.put((rates, peak_mb))
+
+
+def run_workload(workload, n, repeat):
+    """Run one workload `repeat` times in a fresh process and summarize it."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_in_child, args=(workload, n, repeat, queue))
+    proc.start()
+    rates, peak_mb = queue.get()
+    proc.join()
+
+    return {
+        "workload": workload,
+        "size": n,
+        "unit": WORKLOADS[workload][1],
+        "median": statistics.median(rates),
+        "stdev": statistics.stdev(rates) if len(rates) > 1 else 0.0,
+        "min": min(rates),
+        "max": max(rates),
+        "repeat": repeat,
+        "peak_rss_mb": peak_mb,
+    }
+
+
+def run_benchmarks(workloads, sizes, repeat):
+    results = {}
+    for workload in workloads:
+        for n in sizes:
+            result = run_workload(workload, n, repeat)
+            results[f"{workload}/{n}"] = result
+            print(f"{workload + '/' + str(n):<18} {result['median']:>14,.1f} {result['unit']:<14}"
+                  f" ±{result['stdev']:>12,.1f}   peak RSS {result['peak_rss_mb']:8.1f} MB")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print a comparison against a baseline and return the regressed keys.
+
+    A workload regresses when its median throughput drops by more than
+    `tolerance` (a fraction) below the baseline median.
+    """
+    regressions = []
+    print(f"\n{'workload':<18} {'baseline':>14} {'current':>14} {'change':>8}")
+    for key, result in results.items():
+        if key not in baseline:
+            print(f"{key:<18} {'-':>14} {result['median']:>14,.1f} {'new':>8}")
+            continue
+        old = baseline[key]["median"]
+        change = result["median"] / old - 1
+        flag = ""
+        if change < -tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<18} {old:>14,.1f} {result['median']:>14,.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Flappy Bird training throughput")
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="population sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed slowdown before a workload counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.workloads, args.sizes, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Check that BatchedNetwork gives the same outputs as neat's own
+FeedForwardNetwork.activate.
+
+Builds seeded populations whose genomes have grown hidden structure, feeds
+every network random inputs through both implementations (for all networks
+at once and for a shuffled subset with repeats), and exits non-zero if any
+output differs by more than the tolerance. Run it after changing
+batched_network.py or the genome settings in config.txt.
+
+    python check_batched_network.py --seeds 0 1 2 --pop-size 200
+"""
+import argparse
+import random
+import sys
+
+import numpy as np
+
+from batched_network import BatchedNetwork
+from benchmark import load_config, mutated_genomes
+
+import neat
+
+
+def check(seed, pop_size, n_mutations, tolerance):
+    """Return the largest absolute difference seen for one seeded population."""
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    config = load_config(pop_size)
+    genomes = mutated_genomes(config, n_mutations)
+    nets = [neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes]
+    batched = BatchedNetwork(nets)
+
+    worst = 0.0
+    all_rows = np.arange(len(nets))
+    subset = rng.choice(len(nets), size=len(nets) // 2 + 1, replace=True)
+    for rows in (all_rows, subset):
+        inputs = rng.uniform(-600, 600, size=(len(rows), batched.n_inputs))
+        outputs = batched.activate(inputs, rows)
+        expected = np.array([nets[row].activate(list(x)) for row, x in zip(rows, inputs)])
+        worst = max(worst, float(np.max(np.abs(outputs - expected), initial=0.0)))
+    status = "ok" if worst <= tolerance else "MISMATCH"
+    print(f"seed {seed}: {len(nets)} networks, max difference {worst:.3g} ({status})")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check BatchedNetwork against FeedForwardNetwork")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--pop-size", type=int, default=200)
+    parser.add_argument("--mutations", type=int, default=10,
+                        help="mutations applied to every genome before the check")
+    parser.add_argument("--tolerance", type=float, default=1e-12)
+    args = parser.parse_args()
+
+    worst = max(check(seed, args.pop_size, args.mutations, args.tolerance) for seed in args.seeds)
+    if worst > args.tolerance:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
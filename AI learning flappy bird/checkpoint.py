@@ -0,0 +1,149 @@
+"""
+Training checkpoints and "best so far" exports for NEAT runs.
+
+A checkpoint holds the full population, the species set, the genome/species
+counters and the `random` state, so a resumed run continues exactly where it
+stopped. Files are gzip-compressed pickles written atomically (temporary file
++ rename), so a crash mid-write never leaves a truncated checkpoint behind.
+"""
+import copy
+import glob
+import gzip
+import itertools
+import os
+import pickle
+import random
+import tempfile
+
+import neat
+
+CHECKPOINT_PREFIX = "neat-checkpoint-"
+
+
+def atomic_dump(obj, path, compress=True):
+    """Pickle `obj` to `path` through a temporary file in the same directory."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            if compress:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                    pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                pickle.dump(obj, raw, protocol=pickle.HIGHEST_PROTOCOL)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load(path):
+    """Load a file written by atomic_dump, compressed or not."""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rb") as f:
+        return pickle.load(f)
+
+
+def export_best(genome, config, path, generation=None):
+    """
+    Save a genome together with its compiled network, so it can be played
+    back without re-parsing the NEAT config.
+    """
+    atomic_dump({
+        "genome": genome,
+        "net": neat.nn.FeedForwardNetwork.create(genome, config),
+        "fitness": genome.fitness,
+        "generation": generation,
+    }, path, compress=False)
+
+
+def _peek(counter):
+    """Return the next value of an itertools.count and an equivalent counter."""
+    value = next(counter)
+    return value, itertools.count(value)
+
+
+def latest_checkpoint(directory):
+    """Return the path of the newest checkpoint in `directory`, or None."""
+    paths = sorted(glob.glob(os.path.join(directory, CHECKPOINT_PREFIX + "*.pkl.gz")))
+    return paths[-1] if paths else None
+
+
+def restore_population(path, config):
+    """Rebuild a neat.Population from a checkpoint file."""
+    state = load(path)
+    random.setstate(state["random_state"])
+
+    species_set = state["species_set"]
+    pop = neat.Population(config, (state["population"], species_set, state["generation"]))
+    species_set.reporters = pop.reporters
+    species_set.indexer = itertools.count(state["next_species_key"])
+    if state["next_node_key"] is not None:
+        config.genome_config.node_indexer = itertools.count(state["next_node_key"])
+    # Continue numbering genomes after the restored ones, so new genome ids
+    # (which also seed their courses) are never reused
+    pop.reproduction.genome_indexer = itertools.count(max(state["population"]) + 1)
+    pop.best_genome = state["best_genome"]
+    return pop
+
+
+class Checkpointer(neat.reporting.BaseReporter):
+    """
+    Reporter that checkpoints the population every `interval` generations
+    and exports the best genome seen so far after every generation.
+    """
+
+    def __init__(self, directory="checkpoints", interval=5, best_path="best_bird.pickle", keep=3):
+        self.directory = directory
+        self.interval = interval
+        self.best_path = best_path
+        self.keep = keep
+        self.generation = None
+        self.best_genome = None
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        if self.best_genome is None or best_genome.fitness > self.best_genome.fitness:
+            # Elites are re-evaluated in the next generation, which would
+            # overwrite the fitness of a shared object
+            self.best_genome = copy.deepcopy(best_genome)
+            if self.best_path:
+                export_best(self.best_genome, config, self.best_path, self.generation)
+
+    def end_generation(self, config, population, species_set):
+        if self.interval and (self.generation + 1) % self.interval == 0:
+            self.save(config, population, species_set, self.generation + 1)
+
+    def save(self, config, population, species_set, generation):
+        # Counters can't be pickled on newer Pythons, so store their next values
+        next_species_key, species_set.indexer = _peek(species_set.indexer)
+        next_node_key = None
+        if config.genome_config.node_indexer is not None:
+            next_node_key, config.genome_config.node_indexer = _peek(config.genome_config.node_indexer)
+
+        species_set = copy.copy(species_set)
+        species_set.reporters = None
+        species_set.indexer = None
+        path = os.path.join(self.directory, f"{CHECKPOINT_PREFIX}{generation:05d}.pkl.gz")
+        atomic_dump({
+            "generation": generation,
+            "population": population,
+            "species_set": species_set,
+            "best_genome": self.best_genome,
+            "next_species_key": next_species_key,
+            "next_node_key": next_node_key,
+            "random_state": random.getstate(),
+        }, path)
+        print(f"Saved checkpoint {path}")
+
+        if self.keep:
+            old = sorted(glob.glob(os.path.join(self.directory, CHECKPOINT_PREFIX + "*.pkl.gz")))
+            for stale in old[:-self.keep]:
+                os.remove(stale)
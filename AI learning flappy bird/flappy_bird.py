@@ -1,5 +1,6 @@
 import pygame
 import random
+from collections import deque
 import sys
 import neat
 import os
@@ -15,6 +16,10 @@ FLAP_STRENGTH = -7
 PIPE_SPEED = 3
 PIPE_GAP = 150
 PIPE_FREQUENCY = 1500  # milliseconds
+PIPE_WIDTH = 50
+BIRD_SIZE = 30
+FPS = 60
+PIPE_INTERVAL = PIPE_FREQUENCY * FPS // 1000  # frames between pipes
 
 # Colors
 WHITE = (255, 255, 255)
@@ -27,7 +32,7 @@ class Bird:
         self.x = x
         self.y = y
         self.velocity = 0
-        self.rect = pygame.Rect(x, y, 30, 30)
+        self.rect = pygame.Rect(x, y, BIRD_SIZE, BIRD_SIZE)
 
     def flap(self):
         self.velocity = FLAP_STRENGTH
@@ -41,13 +46,13 @@ class Bird:
         pygame.draw.rect(screen, BLUE, self.rect)
 
 class Pipe:
-    def __init__(self, x):
+    def __init__(self, x, rng=random):
         self.x = x
-        self.gap_y = random.randint(100, SCREEN_HEIGHT - 100)
+        self.gap_y = rng.randint(100, SCREEN_HEIGHT - 100)
         self.top_height = self.gap_y - PIPE_GAP // 2
         self.bottom_height = SCREEN_HEIGHT - (self.gap_y + PIPE_GAP // 2)
-        self.top_rect = pygame.Rect(x, 0, 50, self.top_height)
-        self.bottom_rect = pygame.Rect(x, SCREEN_HEIGHT - self.bottom_height, 50, self.bottom_height)
+        self.top_rect = pygame.Rect(x, 0, PIPE_WIDTH, self.top_height)
+        self.bottom_rect = pygame.Rect(x, SCREEN_HEIGHT - self.bottom_height, PIPE_WIDTH, self.bottom_height)
         self.passed = False
 
     def update(self):
@@ -60,18 +65,46 @@ class Pipe:
         pygame.draw.rect(screen, GREEN, self.bottom_rect)
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Flappy Bird AI")
+    def __init__(self, seed=None, headless=False):
+        """
+        seed: seeds the pipe gap RNG, so every episode (and every reset)
+              replays the same course. None gives a random course.
+        headless: draw to an off-screen surface instead of opening a window,
+                  for simulations that call update() as fast as the CPU allows.
+        """
+        self.seed = seed
+        self.headless = headless
+        if headless:
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Flappy Bird AI")
         self.clock = pygame.time.Clock()
+        # Fonts and rendered text are cached; the score is re-rendered only
+        # when it changes
+        self.font = pygame.font.Font(None, 36)
+        self.game_over_text = self.font.render('Game Over! Press R to restart', True, BLACK)
         self.reset_game()
 
     def reset_game(self):
         self.bird = Bird(SCREEN_WIDTH // 3, SCREEN_HEIGHT // 2)
-        self.pipes = []
+        # Pipes ordered by x; new ones are appended, off-screen ones evicted
+        # from the front. next_pipe indexes the first pipe not yet passed.
+        self.pipes = deque()
+        self.next_pipe = 0
         self.score = 0
-        self.last_pipe = pygame.time.get_ticks()
+        self.rng = random.Random(self.seed)
+        # The game clock counts frames, not milliseconds, so the course does
+        # not depend on how fast the loop runs
+        self.frame = 0
+        self.last_pipe = 0
         self.game_over = False
+        # Rendering state: the next draw() repaints the whole screen
+        self.full_redraw = True
+        self.drawn_rects = []
+        self.score_text = None
+        self.drawn_score = None
+        self.drawn_game_over = False
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -81,57 +114,91 @@ class Game:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     self.bird.flap()
+                if event.key == pygame.K_r and self.game_over:
+                    self.reset_game()
 
     def update(self):
         if not self.game_over:
             self.bird.update()
 
             # Generate new pipes
-            current_time = pygame.time.get_ticks()
-            if current_time - self.last_pipe > PIPE_FREQUENCY:
-                self.pipes.append(Pipe(SCREEN_WIDTH))
-                self.last_pipe = current_time
+            self.frame += 1
+            if self.frame - self.last_pipe >= PIPE_INTERVAL:
+                self.pipes.append(Pipe(SCREEN_WIDTH, self.rng))
+                self.last_pipe = self.frame
 
             # Update pipes
-            for pipe in self.pipes[:]:
-                pipe.update()
-                if pipe.x < -50:
-                    self.pipes.remove(pipe)
-                if not pipe.passed and pipe.x < self.bird.x:
-                    pipe.passed = True
-                    self.score += 1
-
-            # Check collisions
             for pipe in self.pipes:
+                pipe.update()
+            while self.pipes and self.pipes[0].x < -PIPE_WIDTH:
+                self.pipes.popleft()
+                self.next_pipe -= 1
+            while self.next_pipe < len(self.pipes) and self.pipes[self.next_pipe].x < self.bird.x:
+                self.pipes[self.next_pipe].passed = True
+                self.next_pipe += 1
+                self.score += 1
+
+            # Check collisions; only the last passed pipe and the next one
+            # can overlap the bird
+            if self.bird.y < 0 or self.bird.y > SCREEN_HEIGHT:
+                self.game_over = True
+            for i in range(max(self.next_pipe - 1, 0), min(self.next_pipe + 1, len(self.pipes))):
+                pipe = self.pipes[i]
                 if (self.bird.rect.colliderect(pipe.top_rect) or
-                    self.bird.rect.colliderect(pipe.bottom_rect) or
-                    self.bird.y < 0 or
-                    self.bird.y > SCREEN_HEIGHT):
+                    self.bird.rect.colliderect(pipe.bottom_rect)):
                     self.game_over = True
 
+    def pipe_ahead(self):
+        """Return the closest pipe ahead of the bird, or None."""
+        for i in range(self.next_pipe, min(self.next_pipe + 2, len(self.pipes))):
+            if self.pipes[i].x > self.bird.x:
+                return self.pipes[i]
+        return None
+
     def draw(self):
-        self.screen.fill(WHITE)
+        # Nothing moves once the game over screen is up
+        if self.drawn_game_over and not self.full_redraw:
+            return
+
+        screen_rect = self.screen.get_rect()
+        if self.full_redraw:
+            self.screen.fill(WHITE)
+            dirty = [screen_rect]
+        else:
+            # Erase last frame's sprites
+            for rect in self.drawn_rects:
+                self.screen.fill(WHITE, rect)
+            dirty = list(self.drawn_rects)
+
         self.bird.draw(self.screen)
         for pipe in self.pipes:
             pipe.draw(self.screen)
+        drawn = [self.bird.rect.clip(screen_rect)]
+        for pipe in self.pipes:
+            drawn.append(pipe.top_rect.clip(screen_rect))
+            drawn.append(pipe.bottom_rect.clip(screen_rect))
         
         # Draw score
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f'Score: {self.score}', True, BLACK)
-        self.screen.blit(score_text, (10, 10))
+        if self.score != self.drawn_score:
+            self.score_text = self.font.render(f'Score: {self.score}', True, BLACK)
+            self.drawn_score = self.score
+        drawn.append(self.screen.blit(self.score_text, (10, 10)))
 
         if self.game_over:
-            game_over_text = font.render('Game Over! Press R to restart', True, BLACK)
-            self.screen.blit(game_over_text, (SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2))
+            drawn.append(self.screen.blit(self.game_over_text, (SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2)))
+            self.drawn_game_over = True
 
-        pygame.display.flip()
+        self.drawn_rects = drawn
+        self.full_redraw = False
+        if not self.headless:
+            pygame.display.update(dirty + drawn)
 
     def run(self):
         while True:
             self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(60)
+            self.clock.tick(FPS)
 
 if __name__ == "__main__":
     game = Game()
@@ -0,0 +1,150 @@
+"""
+Per-phase profiling of NEAT generations.
+
+`PhaseProfiler` collects wall time per phase of the evaluation loop (network
+compilation, observations, activation, physics, collision checks), frames
+simulated, network activations and the number of birds alive on each frame.
+`ProfilingReporter` adds the time spent in NEAT reproduction/speciation and
+writes one CSV row plus one JSON file per generation.
+
+Code that is instrumented takes a profiler and defaults to `NULL_PROFILER`,
+whose hooks do nothing, so profiling costs next to nothing when disabled.
+"""
+import contextlib
+import csv
+import json
+import os
+import time
+
+import neat
+
+PHASES = ["compile", "observe", "activate", "physics", "collision"]
+
+
+class _PhaseTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.times[self.name] += time.perf_counter() - self.start
+
+
+class PhaseProfiler:
+    enabled = True
+
+    def __init__(self):
+        self._timers = {}
+        self.reset()
+
+    def reset(self):
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.frames = 0
+        self.activations = 0
+        self.alive_per_frame = []
+
+    def phase(self, name):
+        """Context manager adding its wall time to phase `name` (one of PHASES)."""
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def count_frame(self, frame, n_alive):
+        """Record one simulated frame with `n_alive` birds (and activations)."""
+        self.frames += 1
+        self.activations += n_alive
+        self._add_alive(frame, n_alive)
+
+    def _add_alive(self, frame, n_alive):
+        # Summed over every simulation run during the generation
+        if frame >= len(self.alive_per_frame):
+            self.alive_per_frame.extend([0] * (frame + 1 - len(self.alive_per_frame)))
+        self.alive_per_frame[frame] += n_alive
+
+    def snapshot(self):
+        return {
+            "times": dict(self.times),
+            "frames": self.frames,
+            "activations": self.activations,
+            "alive_per_frame": list(self.alive_per_frame),
+        }
+
+    def merge(self, snapshot):
+        """Add the counters of another profiler, e.g. from a worker process."""
+        for name, seconds in snapshot["times"].items():
+            self.times[name] += seconds
+        self.frames += snapshot["frames"]
+        self.activations += snapshot["activations"]
+        for frame, n_alive in enumerate(snapshot["alive_per_frame"]):
+            self._add_alive(frame, n_alive)
+
+
+class NullProfiler:
+    enabled = False
+
+    _context = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._context
+
+    def count_frame(self, frame, n_alive):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class ProfilingReporter(neat.reporting.BaseReporter):
+    """
+    Reporter writing `profile.csv` (one row per generation) and
+    `generation-XXXXX.json` (with the birds-alive curve) to `directory`.
+
+    Add it before other reporters that do I/O in end_generation, so their
+    time isn't counted as reproduction.
+    """
+
+    def __init__(self, profiler, directory="profile"):
+        self.profiler = profiler
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.csv_path = os.path.join(directory, "profile.csv")
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.profiler.reset()
+        self.start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.evaluated = time.perf_counter()
+        self.best_fitness = best_genome.fitness
+
+    def end_generation(self, config, population, species_set):
+        p = self.profiler
+        activate_time = p.times.get("activate", 0.0)
+        row = {
+            "generation": self.generation,
+            "evaluate_s": self.evaluated - self.start,
+            **{f"{name}_s": seconds for name, seconds in p.times.items()},
+            "reproduce_s": time.perf_counter() - self.evaluated,
+            "frames": p.frames,
+            "activations": p.activations,
+            "activations_per_s": p.activations / activate_time if activate_time else 0.0,
+            "best_fitness": self.best_fitness,
+        }
+
+        new_file = not os.path.exists(self.csv_path)
+        with open(self.csv_path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(row))
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+
+        json_path = os.path.join(self.directory, f"generation-{self.generation:05d}.json")
+        with open(json_path, "w") as f:
+            json.dump({**row, "alive_per_frame": p.alive_per_frame}, f)
@@ -0,0 +1,275 @@
+"""
+Episode recording and replay for evolved birds.
+
+Every evaluated episode is stored as a compact trace: the course seed, the
+flap decisions as a bitset and the bird's y after every frame as float32.
+Traces go to an append-only data file `<path>.bin`, and each episode gets
+a fixed-width record in `<path>.idx` (genome id, generation, seed, length,
+fitness, offset). Both files are read through memory maps, so any frame of
+any episode can be looked up without re-simulating, and thousands of
+episodes can be analysed without loading them all.
+
+The pipes are not stored: the course of a seed is the same for the
+simulator and `flappy_bird.Game`, and pipe positions follow from the frame
+number, so `course_at` reconstructs them directly.
+
+    python replay.py episodes                  # list the recorded episodes
+    python replay.py episodes --episode 12     # watch episode 12
+    python replay.py episodes --best 7         # watch the best of generation 7
+"""
+import argparse
+import os
+import random
+
+import numpy as np
+import neat
+import pygame
+
+from flappy_bird import (SCREEN_WIDTH, SCREEN_HEIGHT, PIPE_SPEED, PIPE_GAP,
+                         PIPE_WIDTH, PIPE_INTERVAL, BIRD_SIZE, FPS,
+                         WHITE, BLACK, GREEN, BLUE)
+from simulation import BIRD_X, GAP_MIN, GAP_MAX
+
+INDEX_DTYPE = np.dtype([
+    ("genome_id", "<i8"),
+    ("generation", "<i4"),
+    ("n_frames", "<i4"),
+    ("seed", "<i8"),
+    ("fitness", "<f8"),
+    ("offset", "<i8"),
+])
+
+
+def _flap_bytes(n_frames):
+    # Bitset padded to 4 bytes so the float32 y values stay aligned
+    return -(-n_frames // 32) * 4
+
+
+class TraceRecorder:
+    """
+    Collects the trace of every bird during one simulator run.
+
+    Birds only ever die, so each frame stores just the live birds' values;
+    `episodes` regroups them per bird at the end.
+    """
+
+    def __init__(self):
+        self.birds = []
+        self.flaps = []
+        self.ys = []
+
+    def record_frame(self, alive_idx, flap, y):
+        self.birds.append(alive_idx)
+        self.flaps.append(np.asarray(flap, dtype=bool))
+        self.ys.append(y.astype(np.float32))
+
+    def episodes(self, genome_ids, seeds, fitnesses):
+        """Return (genome_id, seed, fitness, flaps, ys) for every bird."""
+        if not self.birds:
+            return []
+        birds = np.concatenate(self.birds)
+        # A stable sort keeps each bird's frames in order
+        order = np.argsort(birds, kind="stable")
+        flaps = np.concatenate(self.flaps)[order]
+        ys = np.concatenate(self.ys)[order]
+        bounds = np.searchsorted(birds[order], np.arange(len(genome_ids) + 1))
+        return [(genome_id, seed, float(fitness), flaps[start:end], ys[start:end])
+                for genome_id, seed, fitness, start, end
+                in zip(genome_ids, seeds, fitnesses, bounds[:-1], bounds[1:])]
+
+
+class EpisodeLog(neat.reporting.BaseReporter):
+    """
+    Append-only episode store. As a NEAT reporter it tags the episodes it is
+    given with the current generation.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.generation = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.data = open(path + ".bin", "ab")
+        self.index = open(path + ".idx", "ab")
+        # Drop a partially written index record left by a crash
+        size = self.index.seek(0, os.SEEK_END)
+        if size % INDEX_DTYPE.itemsize:
+            self.index.truncate(size - size % INDEX_DTYPE.itemsize)
+        self.offset = self.data.seek(0, os.SEEK_END)
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def append(self, episodes):
+        """Write (genome_id, seed, fitness, flaps, ys) episodes."""
+        records = np.zeros(len(episodes), dtype=INDEX_DTYPE)
+        for record, (genome_id, seed, fitness, flaps, ys) in zip(records, episodes):
+            n = len(ys)
+            bits = np.zeros(_flap_bytes(n), dtype=np.uint8)
+            packed = np.packbits(flaps)
+            bits[:len(packed)] = packed
+            self.data.write(bits.tobytes())
+            self.data.write(np.asarray(ys, dtype="<f4").tobytes())
+            record["genome_id"] = genome_id
+            record["generation"] = self.generation
+            record["n_frames"] = n
+            record["seed"] = seed
+            record["fitness"] = fitness
+            record["offset"] = self.offset
+            self.offset += len(bits) + 4 * n
+        # Data goes to disk before the index that points at it
+        self.data.flush()
+        self.index.write(records.tobytes())
+        self.index.flush()
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class EpisodeReader:
+    """Memory-mapped access to an episode store."""
+
+    def __init__(self, path):
+        n_records = os.path.getsize(path + ".idx") // INDEX_DTYPE.itemsize
+        self.index = (np.memmap(path + ".idx", dtype=INDEX_DTYPE, mode="r", shape=(n_records,))
+                      if n_records else np.zeros(0, dtype=INDEX_DTYPE))
+        self.data = (np.memmap(path + ".bin", dtype=np.uint8, mode="r")
+                     if os.path.getsize(path + ".bin") else np.zeros(0, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.index)
+
+    def select(self, generation=None, genome_id=None):
+        """Indices of the episodes matching the given fields."""
+        mask = np.ones(len(self.index), dtype=bool)
+        if generation is not None:
+            mask &= self.index["generation"] == generation
+        if genome_id is not None:
+            mask &= self.index["genome_id"] == genome_id
+        return np.flatnonzero(mask)
+
+    def best(self, generation):
+        """Index of the highest-fitness episode of a generation."""
+        candidates = self.select(generation=generation)
+        return candidates[np.argmax(self.index["fitness"][candidates])]
+
+    def y(self, i):
+        """Bird y after every frame of episode i (a read-only view)."""
+        record = self.index[i]
+        start = int(record["offset"]) + _flap_bytes(int(record["n_frames"]))
+        return self.data[start:start + 4 * int(record["n_frames"])].view("<f4")
+
+    def flaps(self, i):
+        """Flap decision of every frame of episode i."""
+        record = self.index[i]
+        n = int(record["n_frames"])
+        start = int(record["offset"])
+        return np.unpackbits(self.data[start:start + _flap_bytes(n)], count=n).astype(bool)
+
+    def frame(self, i, t):
+        """(y, flapped) of episode i at frame t, without touching other frames."""
+        record = self.index[i]
+        start = int(record["offset"])
+        byte = self.data[start + t // 8]
+        flapped = bool((byte >> (7 - t % 8)) & 1)
+        y_start = start + _flap_bytes(int(record["n_frames"])) + 4 * t
+        return float(self.data[y_start:y_start + 4].view("<f4")[0]), flapped
+
+
+def course_at(seed, frame, gaps=None):
+    """
+    Return [(x, gap_y), ...] of the pipes on screen after `frame` updates of
+    the course with this seed. `gaps` can cache the course's gap list.
+    """
+    if gaps is None:
+        gaps = []
+    n_spawned = frame // PIPE_INTERVAL
+    if len(gaps) < n_spawned:
+        rng = random.Random(seed)
+        gaps[:] = [rng.randint(GAP_MIN, GAP_MAX) for _ in range(n_spawned)]
+    pipes = []
+    for k in range(n_spawned):
+        x = SCREEN_WIDTH - PIPE_SPEED * (frame - (k + 1) * PIPE_INTERVAL + 1)
+        if x >= -PIPE_WIDTH:
+            pipes.append((x, gaps[k]))
+    return pipes
+
+
+def view(reader, i):
+    """
+    Play episode i in a window. Space pauses, left/right step one frame,
+    up/down jump a second, Home restarts.
+    """
+    record = reader.index[i]
+    seed, n_frames = int(record["seed"]), int(record["n_frames"])
+    ys = reader.y(i)
+    gaps = []
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption(f"Replay: genome {record['genome_id']}, "
+                               f"generation {record['generation']}")
+    font = pygame.font.Font(None, 36)
+    clock = pygame.time.Clock()
+    t, paused = 0, False
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    t += 1
+                elif event.key == pygame.K_LEFT:
+                    t -= 1
+                elif event.key == pygame.K_UP:
+                    t += FPS
+                elif event.key == pygame.K_DOWN:
+                    t -= FPS
+                elif event.key == pygame.K_HOME:
+                    t = 0
+        t = max(0, min(t, n_frames - 1))
+
+        screen.fill(WHITE)
+        for x, gap_y in course_at(seed, t + 1, gaps):
+            pygame.draw.rect(screen, GREEN, (x, 0, PIPE_WIDTH, gap_y - PIPE_GAP // 2))
+            pygame.draw.rect(screen, GREEN, (x, gap_y + PIPE_GAP // 2, PIPE_WIDTH,
+                                             SCREEN_HEIGHT - (gap_y + PIPE_GAP // 2)))
+        pygame.draw.rect(screen, BLUE, (BIRD_X, round(float(ys[t])), BIRD_SIZE, BIRD_SIZE))
+        text = font.render(f"Frame {t + 1}/{n_frames}", True, BLACK)
+        screen.blit(text, (10, 10))
+        pygame.display.flip()
+
+        clock.tick(FPS)
+        if not paused and t < n_frames - 1:
+            t += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or replay recorded episodes")
+    parser.add_argument("path", help="episode store, without the .bin/.idx suffix")
+    parser.add_argument("--episode", type=int, help="episode number to watch")
+    parser.add_argument("--best", type=int, metavar="GENERATION",
+                        help="watch the best episode of a generation")
+    args = parser.parse_args()
+
+    reader = EpisodeReader(args.path)
+    if args.episode is not None:
+        view(reader, args.episode)
+    elif args.best is not None:
+        view(reader, reader.best(args.best))
+    else:
+        index = reader.index
+        print(f"{len(reader)} episodes")
+        for generation in np.unique(index["generation"]):
+            rows = index[index["generation"] == generation]
+            print(f"generation {generation}: {len(rows)} episodes, "
+                  f"best fitness {rows['fitness'].max():.1f}, "
+                  f"mean length {rows['n_frames'].mean():.0f} frames")
+
+
+if __name__ == "__main__":
+    main()
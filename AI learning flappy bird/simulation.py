@@ -0,0 +1,197 @@
+"""
+Headless, vectorized Flappy Bird simulation for NEAT training.
+
+The whole population is stored as NumPy arrays (struct-of-arrays) instead of
+one Bird/Pipe/Game object per genome, and every frame is advanced with a
+handful of array operations. No display is created, so it runs as fast as
+the CPU allows.
+
+Like the headless `flappy_bird.Game`, the simulation is counted in frames and
+each bird's pipe gaps come from its own `random.Random(seed)`, so a bird
+simulated here with seed `s` flies exactly the course of `Game(seed=s)`.
+With a `course_seed` the whole population shares one course instead, so the
+obstacles are generated and stored once rather than once per bird.
+"""
+import random
+
+import numpy as np
+
+from profiling import NULL_PROFILER
+from flappy_bird import (SCREEN_WIDTH, SCREEN_HEIGHT, GRAVITY, FLAP_STRENGTH,
+                         PIPE_SPEED, PIPE_GAP, PIPE_WIDTH, PIPE_INTERVAL,
+                         BIRD_SIZE)
+
+BIRD_X = SCREEN_WIDTH // 3
+BIRD_Y = SCREEN_HEIGHT // 2
+GAP_MIN = 100
+GAP_MAX = SCREEN_HEIGHT - 100
+
+# Fitness rewards, same as the original per-Game training loop
+FRAME_REWARD = 0.1
+PIPE_REWARD = 1.0
+
+
+class PopulationSimulator:
+    """
+    Simulates `n_birds` independent birds in lock-step.
+
+    By default every bird flies its own course (its own pipe gaps), but
+    since all birds start together and pipes spawn on a fixed frame interval,
+    the pipe x positions are shared and only the gap heights are stored per
+    bird. On a shared course the gap heights are stored once and broadcast.
+
+    Bird state:  y, velocity, alive, score, fitness      -> shape (n_birds,)
+    Pipe state:  pipe_x                                  -> shape (n_pipes,)
+                 pipe_gap_y          -> shape (n_birds, n_pipes), or (1, n_pipes)
+
+    Pipes are ordered by x and evicted from the front; `next_pipe` indexes
+    the first pipe not yet passed, so scoring, inputs and collisions only
+    look at one or two pipes.
+    """
+
+    def __init__(self, n_birds, seeds=None, course_seed=None, profiler=NULL_PROFILER):
+        """
+        seeds: one course seed per bird; None gives every bird a random course.
+        course_seed: if given, all birds fly the single course of this seed.
+        profiler: a profiling.PhaseProfiler timing the simulation phases.
+        """
+        self.profiler = profiler
+        if seeds is not None and course_seed is not None:
+            raise ValueError("Pass either per-bird seeds or a shared course_seed, not both")
+        self.n_birds = n_birds
+        self.shared_course = course_seed is not None
+        if self.shared_course:
+            self.seeds = [course_seed]
+        else:
+            self.seeds = list(seeds) if seeds is not None else [None] * n_birds
+            if len(self.seeds) != n_birds:
+                raise ValueError(f"Expected {n_birds} seeds, got {len(self.seeds)}")
+        self.reset()
+
+    def reset(self):
+        n = self.n_birds
+        self.rngs = [random.Random(seed) for seed in self.seeds]
+        self.frame = 0
+        self.y = np.full(n, float(BIRD_Y))
+        self.velocity = np.zeros(n)
+        self.alive = np.ones(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.fitness = np.zeros(n)
+        self.pipe_x = np.zeros(0, dtype=np.int64)
+        self.next_pipe = 0
+        self.pipe_gap_y = np.zeros((len(self.seeds), 0), dtype=np.int64)
+
+    def observations(self):
+        """
+        Build the 4 network inputs for every bird, shape (n_birds, 4).
+
+        Uses the closest pipe still ahead of the birds, like the original
+        training loop; without one the gap defaults to mid-screen.
+        """
+        obs = np.empty((self.n_birds, 4))
+        obs[:, 0] = self.y / SCREEN_HEIGHT
+        obs[:, 3] = self.velocity / 10
+        i = self.pipe_ahead()
+        if i is not None:
+            obs[:, 1] = self.pipe_gap_y[:, i] / SCREEN_HEIGHT
+            obs[:, 2] = (self.pipe_x[i] - BIRD_X) / SCREEN_WIDTH
+        else:
+            obs[:, 1] = 0.5
+            obs[:, 2] = 1
+        return obs
+
+    def pipe_ahead(self):
+        """Return the index of the closest pipe ahead of the birds, or None."""
+        for i in range(self.next_pipe, min(self.next_pipe + 2, len(self.pipe_x))):
+            if self.pipe_x[i] > BIRD_X:
+                return i
+        return None
+
+    def step(self, flap):
+        """
+        Advance all live birds by one frame.
+
+        flap: boolean array of shape (n_birds,), True for birds that flap.
+        Returns the boolean mask of birds that died during this frame.
+        """
+        alive = self.alive
+
+        with self.profiler.phase("physics"):
+            # Bird physics
+            self.velocity[flap & alive] = FLAP_STRENGTH
+            self.velocity[alive] += GRAVITY
+            self.y[alive] += self.velocity[alive]
+
+            # Spawn, move and evict pipes
+            self.frame += 1
+            if self.frame % PIPE_INTERVAL == 0:
+                self._spawn_pipe()
+            self.pipe_x -= PIPE_SPEED
+            if len(self.pipe_x) and self.pipe_x[0] < -PIPE_WIDTH:
+                self.pipe_x = self.pipe_x[1:]
+                self.pipe_gap_y = self.pipe_gap_y[:, 1:]
+                self.next_pipe -= 1
+
+            # Survival and pipe rewards
+            n_passed = 0
+            while self.next_pipe < len(self.pipe_x) and self.pipe_x[self.next_pipe] < BIRD_X:
+                self.next_pipe += 1
+                n_passed += 1
+            self.score[alive] += n_passed
+            self.fitness[alive] += FRAME_REWARD + PIPE_REWARD * n_passed
+
+        with self.profiler.phase("collision"):
+            died = alive & (self._collisions() | (self.y < 0) | (self.y > SCREEN_HEIGHT))
+            self.alive &= ~died
+        return died
+
+    def _spawn_pipe(self):
+        gap_y = np.zeros(len(self.rngs), dtype=np.int64)
+        if self.shared_course:
+            gap_y[0] = self.rngs[0].randint(GAP_MIN, GAP_MAX)
+        else:
+            # Dead birds never look at their pipes, so they don't draw new ones
+            for i in np.flatnonzero(self.alive):
+                gap_y[i] = self.rngs[i].randint(GAP_MIN, GAP_MAX)
+        self.pipe_x = np.append(self.pipe_x, SCREEN_WIDTH)
+        self.pipe_gap_y = np.column_stack((self.pipe_gap_y, gap_y))
+
+    def _collisions(self):
+        """Vectorized AABB test of every bird against the nearby pipe pairs."""
+        # Only the last passed pipe and the next one can overlap the birds
+        near = slice(max(self.next_pipe - 1, 0), self.next_pipe + 1)
+        pipe_x = self.pipe_x[near]
+        overlap_x = (pipe_x < BIRD_X + BIRD_SIZE) & (pipe_x + PIPE_WIDTH > BIRD_X)
+        if not overlap_x.any():
+            return np.zeros(self.n_birds, dtype=bool)
+
+        # pygame.Rect rounds coordinates half away from zero
+        top = np.trunc(self.y + np.copysign(0.5, self.y))[:, None]
+        bottom = top + BIRD_SIZE
+        gap_y = self.pipe_gap_y[:, near][:, overlap_x]
+        hit_top = (top < gap_y - PIPE_GAP // 2) & (bottom > 0)
+        hit_bottom = (bottom > gap_y + PIPE_GAP // 2) & (top < SCREEN_HEIGHT)
+        return (hit_top | hit_bottom).any(axis=1)
+
+    def run(self, policy, max_frames=None, recorder=None):
+        """
+        Run until every bird is dead or `max_frames` is reached.
+
+        policy(obs, alive_idx) returns a boolean flap decision for each of
+        the live birds in `alive_idx`.
+        recorder: a replay.TraceRecorder that stores every bird's flaps and
+                  positions.
+        """
+        profiler = self.profiler
+        while self.alive.any() and (max_frames is None or self.frame < max_frames):
+            with profiler.phase("observe"):
+                alive_idx = np.flatnonzero(self.alive)
+                obs = self.observations()[alive_idx]
+            profiler.count_frame(self.frame, len(alive_idx))
+            with profiler.phase("activate"):
+                flap = np.zeros(self.n_birds, dtype=bool)
+                flap[alive_idx] = policy(obs, alive_idx)
+            self.step(flap)
+            if recorder is not None:
+                recorder.record_frame(alive_idx, flap[alive_idx], self.y[alive_idx])
+        return self.fitness
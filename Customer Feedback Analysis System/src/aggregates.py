@@ -0,0 +1,241 @@
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+
+from sketches import CoMoments, Moments, QuantileSketch, Tails
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+class Aggregates:
+    """
+    Every aggregate the analysis plots and report use. Entries for columns
+    the data doesn't have are None.
+    """
+
+    def __init__(self, n_rows, n_columns, missing, describe, correlation, value_counts,
+                 rating_counts=None, age_histogram=None, rating_by_category=None,
+                 purchase_by_category=None):
+        self.n_rows = n_rows
+        self.n_columns = n_columns
+        self.missing = missing
+        self.describe = describe
+        self.correlation = correlation
+        self.value_counts = value_counts
+        self.rating_counts = rating_counts
+        self.age_histogram = age_histogram
+        self.rating_by_category = rating_by_category
+        self.purchase_by_category = purchase_by_category
+
+    @classmethod
+    def from_frame(cls, df, age_bins=30):
+        """Compute all aggregates together from one frame."""
+        categorical = df.select_dtypes(include=['object', 'category']).columns
+        aggregates = cls(
+            n_rows=len(df),
+            n_columns=len(df.columns),
+            missing=df.isnull().sum(),
+            describe=df.describe(),
+            correlation=df.select_dtypes(include=[np.number]).corr(),
+            value_counts={column: df[column].value_counts() for column in categorical},
+        )
+        if 'rating' in df:
+            aggregates.rating_counts = df['rating'].value_counts().sort_index()
+        if 'customer_age' in df:
+            ages = df['customer_age'].dropna().to_numpy(dtype=float)
+            aggregates.age_histogram = np.histogram(ages, bins=age_bins)
+
+        if 'product_category' in df:
+            groups = df.groupby('product_category', observed=True)
+            if 'rating' in df:
+                aggregates.rating_by_category = \
+                    groups['rating'].mean().sort_values(ascending=False)
+            if 'purchase_amount' in df:
+                # Box plot statistics (quartiles, whiskers, fliers) per category
+                aggregates.purchase_by_category = [
+                    cbook.boxplot_stats(amounts.dropna().to_numpy(), labels=[str(category)])[0]
+                    for category, amounts in groups['purchase_amount']
+                ]
+        return aggregates
+
+
+def _sketch_box_stats(moments, sketch, tails, label, whis=1.5):
+    """
+    Box plot statistics like cbook.boxplot_stats, from a quantile sketch.
+    Whiskers and fliers are exact when the tails hold every value beyond
+    the fences; otherwise that side comes from the values the sketch kept,
+    and 'sampled' is set.
+    """
+    q1, med, q3 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    low, high = q1 - whis * iqr, q3 + whis * iqr
+    # The sample: the values the sketch kept, plus the exact extremes if it
+    # dropped them
+    values = sketch.values()
+    extremes = np.array([moments.min, moments.max])
+    values = np.append(values, np.unique(extremes[~np.isin(extremes, values)]))
+    inside = values[(values >= low) & (values <= high)]
+
+    sampled = False
+    if tails.below(low) is not None and (tails.low >= low).any():
+        whislo = tails.low[tails.low >= low][0]
+        low_fliers = tails.low[tails.low < whislo]
+    else:
+        whislo = inside.min() if len(inside) else q1
+        low_fliers = values[values < whislo]
+        sampled = True
+    if tails.above(high) is not None and (tails.high <= high).any():
+        whishi = tails.high[tails.high <= high][-1]
+        high_fliers = tails.high[tails.high > whishi]
+    else:
+        whishi = inside.max() if len(inside) else q3
+        high_fliers = values[values > whishi]
+        sampled = True
+    notch = 1.57 * iqr / np.sqrt(moments.count)
+    return {
+        'label': label, 'mean': moments.mean, 'med': med, 'q1': q1, 'q3': q3, 'iqr': iqr,
+        'cilo': med - notch, 'cihi': med + notch, 'whislo': whislo, 'whishi': whishi,
+        'fliers': np.sort(np.concatenate([low_fliers, high_fliers])), 'sampled': sampled,
+    }
+
+
+class SummaryState:
+    """
+    Mergeable summary of everything analysed so far.
+
+    update() folds in a batch of new rows in time proportional to the batch,
+    and aggregates() turns the state into the same Aggregates the analyzer
+    computes from a full frame. Counts, means, standard deviations, min/max,
+    correlations, the age histogram and the per-category rating means are
+    exact; quartiles are exact up to the sketch size and approximate beyond
+    it. Box plot whiskers and fliers are exact values while a category has
+    at most Tails.k fliers per side, and sampled past that. Only numeric
+    columns appear in `describe`.
+    """
+
+    def __init__(self):
+        self.n_rows = 0
+        self.columns = None
+        self.numeric = []
+        self.categorical = []
+        self.missing = None
+        self.moments = {}
+        self.quantiles = {}
+        self.co_moments = None
+        self.value_counts = {}
+        self.rating_counts = pd.Series(dtype='int64')
+        self.age_counts = pd.Series(dtype='int64')
+        self.rating_sums = pd.DataFrame(columns=['sum', 'count'], dtype=float)
+        self.purchase_moments = {}
+        self.purchase_quantiles = {}
+        self.purchase_tails = {}
+
+    def update(self, batch):
+        """Add a batch of rows."""
+        if self.columns is None:
+            self.columns = list(batch.columns)
+            self.numeric = list(batch.select_dtypes(include=[np.number]).columns)
+            self.categorical = list(batch.select_dtypes(include=['object', 'category']).columns)
+            self.missing = pd.Series(0, index=self.columns)
+            self.moments = {column: Moments() for column in self.numeric}
+            self.quantiles = {column: QuantileSketch() for column in self.numeric}
+            self.co_moments = CoMoments(len(self.numeric))
+            self.value_counts = {column: pd.Series(dtype='int64') for column in self.categorical}
+        elif list(batch.columns) != self.columns:
+            raise ValueError(f"Batch columns {list(batch.columns)} don't match {self.columns}")
+
+        self.n_rows += len(batch)
+        self.missing += batch.isnull().sum()
+
+        numeric = batch[self.numeric].to_numpy(dtype=float, na_value=np.nan)
+        for i, column in enumerate(self.numeric):
+            self.moments[column].update(numeric[:, i])
+            self.quantiles[column].update(numeric[:, i])
+        self.co_moments.update(numeric)
+
+        for column in self.categorical:
+            counts = batch[column].value_counts()
+            counts.index = counts.index.astype(object)
+            self.value_counts[column] = self.value_counts[column].add(counts, fill_value=0)
+        if 'rating' in batch:
+            self.rating_counts = self.rating_counts.add(
+                batch['rating'].value_counts(), fill_value=0)
+        if 'customer_age' in batch:
+            self.age_counts = self.age_counts.add(
+                batch['customer_age'].value_counts(), fill_value=0)
+
+        if 'product_category' in batch:
+            groups = batch.groupby(batch['product_category'].astype(object))
+            if 'rating' in batch:
+                sums = groups['rating'].agg(['sum', 'count'])
+                self.rating_sums = self.rating_sums.add(sums, fill_value=0)
+            if 'purchase_amount' in batch:
+                for category, amounts in groups['purchase_amount']:
+                    values = amounts.to_numpy(dtype=float, na_value=np.nan)
+                    self.purchase_moments.setdefault(category, Moments()).update(values)
+                    self.purchase_quantiles.setdefault(category, QuantileSketch()).update(values)
+                    self.purchase_tails.setdefault(category, Tails()).update(values)
+        return self
+
+    def aggregates(self, age_bins=30):
+        """The Aggregates of all data added so far."""
+        describe = pd.DataFrame(
+            {column: [m.count, m.mean, m.std(), m.min,
+                      *(self.quantiles[column].quantile(q) for q in (0.25, 0.5, 0.75)), m.max]
+             for column, m in self.moments.items()},
+            index=DESCRIBE_INDEX, dtype=float)
+        value_counts = {}
+        for column, counts in self.value_counts.items():
+            counts = counts.astype('int64').sort_values(ascending=False, kind='stable')
+            value_counts[column] = counts.rename('count').rename_axis(column)
+        aggregates = Aggregates(
+            n_rows=self.n_rows,
+            n_columns=len(self.columns or []),
+            missing=self.missing,
+            describe=describe,
+            correlation=pd.DataFrame(self.co_moments.correlation() if self.numeric else None,
+                                     index=self.numeric, columns=self.numeric),
+            value_counts=value_counts,
+        )
+
+        if self.columns and 'rating' in self.columns:
+            aggregates.rating_counts = self.rating_counts.astype('int64').sort_index() \
+                .rename('count').rename_axis('rating')
+        if self.columns and 'customer_age' in self.columns:
+            # Ages are whole numbers, so their counts reproduce the histogram exactly
+            ages = self.age_counts.sort_index()
+            aggregates.age_histogram = np.histogram(ages.index.to_numpy(dtype=float), bins=age_bins,
+                                                    weights=ages.to_numpy())
+        if len(self.rating_sums):
+            sums = self.rating_sums.sort_index()
+            aggregates.rating_by_category = (sums['sum'] / sums['count'].where(sums['count'] > 0)) \
+                .rename('rating').rename_axis('product_category').sort_values(ascending=False)
+        if self.purchase_moments:
+            aggregates.purchase_by_category = [
+                _sketch_box_stats(self.purchase_moments[category], self.purchase_quantiles[category],
+                                  self.purchase_tails[category], str(category))
+                for category in sorted(self.purchase_moments)
+            ]
+        return aggregates
+
+    def save(self, path):
+        """Write the state atomically, so a crash never leaves half a file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
@@ -1,135 +1,252 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
+
+from aggregates import Aggregates, SummaryState
+from charts import CHARTS, chart_data, chart_workers, render_charts
+from storage import dataset_columns, load_dataset, load_partitioned, null_counts, read_manifest
+from text_analysis import TextAnalyzer
+
+# Columns the plots and reports use
+ANALYSIS_COLUMNS = ['product_category', 'purchase_amount', 'rating', 'customer_age',
+                    'customer_region', 'purchase_channel']
 
 class DataAnalyzer:
-    def __init__(self, df):
+    def __init__(self, df, output_dir='../data'):
+        self.state = None
+        self.state_path = None
+        self._chart_pool = None
         self.df = df
-        plt.style.use('seaborn')
+        self.output_dir = output_dir
+
+    @property
+    def df(self):
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        # A new frame is a new dataset version
+        self._df = df
+        self._aggregates = None
+        # (every column, columns -> null counts) of the dataset df was
+        # loaded from, when it holds only some of its columns
+        self._source = None
+
+    @property
+    def aggregates(self):
+        """
+        Aggregates of the current frame (or summary state), computed once and
+        shared by every plot and report. Call refresh() after modifying `df`
+        in place.
+        """
+        if self._aggregates is None:
+            if self.state is not None:
+                self._aggregates = self.state.aggregates()
+            else:
+                self._aggregates = Aggregates.from_frame(self._df)
+        return self._aggregates
+
+    def refresh(self):
+        """Drop the cached aggregates."""
+        self._aggregates = None
+        return self
+
+    @classmethod
+    def from_file(cls, filepath, columns=ANALYSIS_COLUMNS, output_dir='../data'):
+        """
+        Load a cleaned dataset (CSV, Parquet or Feather), reading only the
+        given columns. Pass columns=None to load all of them. The report
+        still covers every column: the others' missing values are taken from
+        the file (Parquet statistics) when it is saved.
+        """
+        analyzer = cls(load_dataset(filepath, columns=columns), output_dir=output_dir)
+        if columns is not None:
+            analyzer._source = (dataset_columns(filepath),
+                                lambda others: null_counts(filepath, others))
+        return analyzer
+
+    @classmethod
+    def from_partitions(cls, root, start=None, end=None, region=None, category=None,
+                        columns=ANALYSIS_COLUMNS, output_dir='../data'):
+        """
+        Load the rows of a date-partitioned dataset (see
+        DataCleaner.save_cleaned_data) with start <= date <= end, in the
+        given region(s) and product category(s). Partitions that the
+        manifest shows can't match are never read.
+        """
+        filters = {}
+        if region is not None:
+            filters['customer_region'] = region
+        if category is not None:
+            filters['product_category'] = category
+        df = load_partitioned(root, columns=columns, start=start, end=end, filters=filters)
+        analyzer = cls(df, output_dir=output_dir)
+        if columns is not None:
+            # Only the selected rows count, so the other columns are read for the report
+            analyzer._source = (read_manifest(root)['columns'], lambda others: load_partitioned(
+                root, columns=others, start=start, end=end, filters=filters).isnull().sum())
+        return analyzer
+
+    @classmethod
+    def from_state(cls, state_path, output_dir='../data'):
+        """
+        Incremental analyzer backed by the summary state at `state_path`
+        (created on the first ingest). It has no `df`: reports and charts
+        come from the state, and ingest() adds new batches to it.
+        """
+        analyzer = cls(None, output_dir=output_dir)
+        analyzer.state = (SummaryState.load(state_path) if os.path.exists(state_path)
+                          else SummaryState())
+        analyzer.state_path = state_path
+        return analyzer
+
+    def ingest(self, batch):
+        """
+        Add an append-only batch of new feedback to the summary state and
+        save it. Costs time proportional to the batch, not the history.
+        """
+        if self.state is None:
+            raise ValueError("ingest() needs an analyzer created with DataAnalyzer.from_state")
+        self.state.update(batch)
+        self.state.save(self.state_path)
+        self._aggregates = None
+        print(f"Ingested {len(batch)} rows ({self.state.n_rows} in total)")
+        return self
         
+    def render_charts(self, names=None, workers=None):
+        """
+        Render charts (all of them by default) from the cached aggregates.
+        With more than one CPU they are drawn concurrently in a process pool
+        that is started once and shared by every later call (close() stops
+        it); with one CPU, or workers=1, they are drawn in this process.
+        """
+        names = list(CHARTS) if names is None else names
+        jobs = {name: chart_data(self.aggregates, name) for name in names}
+        executor = None
+        if workers is None and chart_workers(len(CHARTS)) > 1:
+            if self._chart_pool is None:
+                self._chart_pool = ProcessPoolExecutor(max_workers=chart_workers(len(CHARTS)))
+            executor = self._chart_pool
+        return render_charts(jobs, self.output_dir, workers=workers, executor=executor)
+
+    def close(self):
+        """Stop the chart process pool, if one was started."""
+        if self._chart_pool is not None:
+            self._chart_pool.shutdown()
+            self._chart_pool = None
+
     def analyze_customer_demographics(self):
         """Analyze customer demographics and create visualizations."""
         print("\nCustomer Demographics Analysis:")
-        
-        # Age distribution
-        plt.figure(figsize=(10, 6))
-        sns.histplot(data=self.df, x='customer_age', bins=30)
-        plt.title('Customer Age Distribution')
-        plt.xlabel('Age')
-        plt.ylabel('Count')
-        plt.savefig('../data/age_distribution.png')
-        plt.close()
-        
-        # Regional distribution
-        plt.figure(figsize=(10, 6))
-        self.df['customer_region'].value_counts().plot(kind='bar')
-        plt.title('Customer Distribution by Region')
-        plt.xlabel('Region')
-        plt.ylabel('Count')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('../data/regional_distribution.png')
-        plt.close()
+        self.render_charts(['age_distribution', 'regional_distribution'])
         
     def analyze_purchase_patterns(self):
         """Analyze purchase patterns and create visualizations."""
         print("\nPurchase Patterns Analysis:")
-        
-        # Purchase amount by category
-        plt.figure(figsize=(12, 6))
-        sns.boxplot(data=self.df, x='product_category', y='purchase_amount')
-        plt.title('Purchase Amount by Product Category')
-        plt.xlabel('Product Category')
-        plt.ylabel('Purchase Amount')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('../data/purchase_by_category.png')
-        plt.close()
-        
-        # Purchase channel distribution
-        plt.figure(figsize=(10, 6))
-        self.df['purchase_channel'].value_counts().plot(kind='pie', autopct='%1.1f%%')
-        plt.title('Purchase Channel Distribution')
-        plt.ylabel('')
-        plt.tight_layout()
-        plt.savefig('../data/purchase_channel_distribution.png')
-        plt.close()
+        self.render_charts(['purchase_by_category', 'purchase_channel_distribution'])
         
     def analyze_customer_satisfaction(self):
         """Analyze customer satisfaction metrics."""
         print("\nCustomer Satisfaction Analysis:")
-        
-        # Rating distribution
-        plt.figure(figsize=(10, 6))
-        sns.countplot(data=self.df, x='rating')
-        plt.title('Customer Rating Distribution')
-        plt.xlabel('Rating')
-        plt.ylabel('Count')
-        plt.savefig('../data/rating_distribution.png')
-        plt.close()
-        
-        # Average rating by category
-        plt.figure(figsize=(12, 6))
-        category_ratings = self.df.groupby('product_category')['rating'].mean().sort_values(ascending=False)
-        category_ratings.plot(kind='bar')
-        plt.title('Average Rating by Product Category')
-        plt.xlabel('Product Category')
-        plt.ylabel('Average Rating')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('../data/ratings_by_category.png')
-        plt.close()
+        self.render_charts(['rating_distribution', 'ratings_by_category'])
+
+    def analyze_feedback_text(self, top_n=10, workers=None):
+        """
+        Score feedback_text sentiment and find the top keywords per product
+        category and rating. The frame needs a feedback_text column, which
+        from_file only loads when asked, e.g.
+        columns=ANALYSIS_COLUMNS + ['feedback_text'].
+        """
+        if self._df is None or 'feedback_text' not in self._df:
+            raise ValueError("analyze_feedback_text() needs a df with a feedback_text column")
+        print("\nFeedback Text Analysis:")
+        result = TextAnalyzer(top_n=top_n).analyze(self._df, workers=workers)
+        print(f"Scored {len(result.scores)} texts in {result.seconds:.2f}s "
+              f"({result.rows_per_sec:,.0f} rows/sec)")
+        for column, table in result.sentiment.items():
+            print(f"\nSentiment by {column}:")
+            print(table)
+            print(f"\nTop keywords by {column}:")
+            for label, keywords in result.keywords[column].items():
+                print(f"{label}: {', '.join(word for word, _ in keywords)}")
+        return result
         
     def generate_summary_statistics(self):
         """Generate summary statistics for the dataset."""
         print("\nSummary Statistics:")
         
         # Numeric columns summary
-        numeric_summary = self.df.describe()
         print("\nNumeric Columns Summary:")
-        print(numeric_summary)
+        print(self.aggregates.describe)
         
         # Categorical columns summary
-        categorical_columns = self.df.select_dtypes(include=['object']).columns
         print("\nCategorical Columns Summary:")
-        for col in categorical_columns:
+        for col, counts in self.aggregates.value_counts.items():
             print(f"\n{col} value counts:")
-            print(self.df[col].value_counts())
+            print(counts)
             
+    def missing_values(self):
+        """
+        Missing values per column. When df holds only some columns of its
+        source dataset, the other columns are counted in the source, so the
+        report is the same as for a full load.
+        """
+        missing = self.aggregates.missing
+        if self._source is None:
+            return missing
+        columns, count_missing = self._source
+        others = [column for column in columns if column not in missing.index]
+        if not others:
+            return missing
+        missing = pd.concat([missing, count_missing(others)])
+        order = columns + [column for column in missing.index if column not in columns]
+        return missing.reindex(order)
+
     def save_analysis_report(self):
         """Save analysis results to a text file."""
-        with open('../data/analysis_report.txt', 'w') as f:
+        aggregates = self.aggregates
+        missing = self.missing_values()
+        report_path = os.path.join(self.output_dir, 'analysis_report.txt')
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(report_path, 'w') as f:
             f.write("Data Analysis Report\n")
             f.write("===================\n\n")
             
             f.write("Dataset Overview:\n")
-            f.write(f"Total records: {len(self.df)}\n")
-            f.write(f"Total columns: {len(self.df.columns)}\n\n")
+            f.write(f"Total records: {aggregates.n_rows}\n")
+            n_columns = aggregates.n_columns if self._source is None else len(missing)
+            f.write(f"Total columns: {n_columns}\n\n")
             
             f.write("Summary Statistics:\n")
-            f.write(self.df.describe().to_string())
+            f.write(aggregates.describe.to_string())
             
             f.write("\n\nMissing Values:\n")
-            f.write(self.df.isnull().sum().to_string())
+            f.write(missing.to_string())
             
             f.write("\n\nCorrelation Analysis:\n")
-            numeric_df = self.df.select_dtypes(include=[np.number])
-            f.write(numeric_df.corr().to_string())
+            f.write(aggregates.correlation.to_string())
             
-        print("\nAnalysis report saved to '../data/analysis_report.txt'")
+        print(f"\nAnalysis report saved to '{report_path}'")
 
 if __name__ == "__main__":
-    # Load the cleaned data
-    df = pd.read_csv('../data/cleaned_customer_feedback.csv')
-    
-    # Initialize analyzer
-    analyzer = DataAnalyzer(df)
+    parser = argparse.ArgumentParser(description="Analyze cleaned customer feedback")
+    parser.add_argument('--state', help="incremental mode: summary state file to update and report on")
+    parser.add_argument('--ingest', nargs='*', default=[], metavar='BATCH',
+                        help="cleaned batch files to add to the state")
+    args = parser.parse_args()
+
+    if args.state:
+        analyzer = DataAnalyzer.from_state(args.state)
+        for batch_path in args.ingest:
+            analyzer.ingest(load_dataset(batch_path, columns=ANALYSIS_COLUMNS))
+    else:
+        # Load the cleaned data
+        analyzer = DataAnalyzer.from_file('../data/cleaned_customer_feedback.parquet')
     
-    # Perform analysis
-    analyzer.analyze_customer_demographics()
-    analyzer.analyze_purchase_patterns()
-    analyzer.analyze_customer_satisfaction()
+    # Perform analysis, rendering all charts at once
+    analyzer.render_charts()
     analyzer.generate_summary_statistics()
-    analyzer.save_analysis_report() 
\ No newline at end of file
+    analyzer.save_analysis_report()
+    analyzer.close()
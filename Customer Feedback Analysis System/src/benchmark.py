@@ -0,0 +1,156 @@
+"""
+Scale benchmark of the feedback pipeline.
+
+For every dataset size, a fixed-seed dataset is generated and pushed
+through generation -> CSV parsing -> DataCleaner -> DataAnalyzer. Each
+method is timed on its own, along with the peak memory it allocates
+(traced with tracemalloc) and how many copies of the parsed data that peak
+amounts to. The JSON report has one line per (rows, step), so reports from
+two versions can be diffed, or compared with --compare.
+
+    python benchmark.py --sizes 100000 1000000 10000000 -o ../data/benchmark.json
+    python benchmark.py --sizes 100000 1000000 --compare ../data/benchmark.json
+
+Memory tracing slows Python-heavy steps down; use --no-memory for clean
+timings. Charts are rendered in worker processes, whose memory isn't traced.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analysis import ANALYSIS_COLUMNS, DataAnalyzer
+from data_cleaning import DataCleaner
+from data_collection import CHUNK_SIZE, generate_dataset
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+END_DATE = datetime(2024, 6, 30)
+OUTLIER_COLUMNS = ['purchase_amount', 'customer_age']
+
+
+def measure(func, trace_memory=True):
+    """Run func() quietly. Returns (result, seconds, peak bytes allocated or None)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            result = func()
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run_size(n_rows, work_dir, seed=42, trace_memory=True):
+    """Benchmark every step on a dataset of n_rows. Returns the result rows."""
+    results = []
+
+    def step(name, func):
+        result, seconds, peak = measure(func, trace_memory)
+        results.append({'rows': n_rows, 'step': name, 'seconds': round(seconds, 4),
+                        'peak_mb': None if peak is None else round(peak / 2**20, 2),
+                        'peak_bytes': peak})
+        print(f"{n_rows:>12,} {name:<44} {seconds:9.3f}s"
+              + ("" if peak is None else f" {peak / 2**20:10.1f} MB"))
+        return result
+
+    data_dir = os.path.join(work_dir, f'rows-{n_rows}')
+    paths = step('generate', lambda: generate_dataset(
+        n_rows, data_dir, seed=seed, chunk_size=min(n_rows, CHUNK_SIZE), workers=1,
+        end_date=END_DATE))
+    df = step('read_csv', lambda: pd.concat([pd.read_csv(path) for path in paths],
+                                            ignore_index=True))
+    data_bytes = int(df.memory_usage(deep=True).sum())
+
+    # Every DataCleaner method on its own, then the whole chain as one plan
+    cleaner = DataCleaner(df)
+    step('DataCleaner.remove_duplicates', lambda: cleaner.remove_duplicates().execute())
+    step('DataCleaner.handle_missing_values',
+         lambda: cleaner.handle_missing_values(strategy='mean').execute())
+    step('DataCleaner.handle_outliers', lambda: cleaner.handle_outliers(OUTLIER_COLUMNS).execute())
+    step('DataCleaner.standardize_dates', lambda: cleaner.standardize_dates('date').execute())
+    step('DataCleaner.chain', lambda: DataCleaner(df).remove_duplicates()
+         .handle_missing_values(strategy='mean').handle_outliers(OUTLIER_COLUMNS)
+         .standardize_dates('date').execute())
+    cleaned_path = os.path.join(work_dir, f'cleaned-{n_rows}.parquet')
+    step('DataCleaner.save_cleaned_data', lambda: cleaner.save_cleaned_data(cleaned_path))
+    del cleaner, df
+
+    output_dir = os.path.join(work_dir, f'analysis-{n_rows}')
+    analyzer = step('DataAnalyzer.from_file', lambda: DataAnalyzer.from_file(
+        cleaned_path, columns=ANALYSIS_COLUMNS + ['feedback_text'], output_dir=output_dir))
+    step('DataAnalyzer.aggregates', lambda: analyzer.aggregates)
+    for method in ['analyze_customer_demographics', 'analyze_purchase_patterns',
+                   'analyze_customer_satisfaction', 'generate_summary_statistics',
+                   'save_analysis_report', 'analyze_feedback_text']:
+        step(f'DataAnalyzer.{method}', getattr(analyzer, method))
+    analyzer.close()
+
+    for result in results:
+        peak = result.pop('peak_bytes')
+        result['copies'] = None if peak is None else round(peak / data_bytes, 2)
+    return results
+
+
+def write_report(results, path, meta):
+    """JSON report with one result per line, so reports diff line by line."""
+    lines = [json.dumps(result, sort_keys=True) for result in results]
+    with open(path, 'w') as f:
+        f.write('{"meta": ' + json.dumps(meta, sort_keys=True) + ',\n "results": [\n  ')
+        f.write(',\n  '.join(lines))
+        f.write('\n]}\n')
+
+
+def compare(results, old_path):
+    """Print how every step's time and memory changed against an older report."""
+    with open(old_path) as f:
+        old = {(r['rows'], r['step']): r for r in json.load(f)['results']}
+    print(f"\n{'rows':>12} {'step':<44} {'old s':>9} {'new s':>9} {'speedup':>8} {'old MB':>9} {'new MB':>9}")
+    for result in results:
+        before = old.get((result['rows'], result['step']))
+        if before is None:
+            continue
+        speedup = before['seconds'] / result['seconds'] if result['seconds'] else float('inf')
+        print(f"{result['rows']:>12,} {result['step']:<44} {before['seconds']:9.3f} "
+              f"{result['seconds']:9.3f} {speedup:7.2f}x {before['peak_mb'] or np.nan:9.1f} "
+              f"{result['peak_mb'] or np.nan:9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the feedback pipeline at several sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', default='../data/benchmark.json')
+    parser.add_argument('--work-dir', help="keep generated and cleaned data here (default: a temp dir)")
+    parser.add_argument('--no-memory', action='store_true', help="don't trace memory")
+    parser.add_argument('--compare', metavar='REPORT', help="earlier report to compare against")
+    args = parser.parse_args()
+
+    meta = {
+        'seed': args.seed, 'end_date': END_DATE.date().isoformat(), 'sizes': args.sizes,
+        'memory_traced': not args.no_memory, 'python': platform.python_version(),
+        'pandas': pd.__version__, 'numpy': np.__version__, 'cpus': os.cpu_count(),
+    }
+    with tempfile.TemporaryDirectory(prefix='benchmark-') as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        results = []
+        for n_rows in args.sizes:
+            results.extend(run_size(n_rows, work_dir, seed=args.seed,
+                                    trace_memory=not args.no_memory))
+
+    write_report(results, args.output, meta)
+    print(f"\nBenchmark report saved to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
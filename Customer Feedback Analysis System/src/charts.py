@@ -0,0 +1,122 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.figure import Figure
+
+
+def _bar(ax, counts):
+    ax.bar([str(label) for label in counts.index], counts.to_numpy())
+
+
+def draw_age_distribution(fig, histogram):
+    ax = fig.subplots()
+    counts, edges = histogram
+    ax.hist(edges[:-1], bins=edges, weights=counts)
+    ax.set_title('Customer Age Distribution')
+    ax.set_xlabel('Age')
+    ax.set_ylabel('Count')
+
+
+def draw_regional_distribution(fig, counts):
+    ax = fig.subplots()
+    _bar(ax, counts)
+    ax.set_title('Customer Distribution by Region')
+    ax.set_xlabel('Region')
+    ax.set_ylabel('Count')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+
+
+def draw_purchase_by_category(fig, box_stats):
+    ax = fig.subplots()
+    ax.bxp(box_stats)
+    # Summary states keep exact outliers up to a limit, then a sample
+    sampled = any(stats.get('sampled') for stats in box_stats)
+    ax.set_title('Purchase Amount by Product Category' + (' (outliers sampled)' if sampled else ''))
+    ax.set_xlabel('Product Category')
+    ax.set_ylabel('Purchase Amount')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+
+
+def draw_purchase_channel_distribution(fig, counts):
+    ax = fig.subplots()
+    ax.pie(counts.to_numpy(), labels=[str(label) for label in counts.index], autopct='%1.1f%%')
+    ax.set_title('Purchase Channel Distribution')
+    fig.tight_layout()
+
+
+def draw_rating_distribution(fig, counts):
+    ax = fig.subplots()
+    _bar(ax, counts)
+    ax.set_title('Customer Rating Distribution')
+    ax.set_xlabel('Rating')
+    ax.set_ylabel('Count')
+
+
+def draw_ratings_by_category(fig, ratings):
+    ax = fig.subplots()
+    _bar(ax, ratings)
+    ax.set_title('Average Rating by Product Category')
+    ax.set_xlabel('Product Category')
+    ax.set_ylabel('Average Rating')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+
+
+# Chart name -> (draw function, figure size, aggregates -> data to draw)
+CHARTS = {
+    'age_distribution': (draw_age_distribution, (10, 6),
+                         lambda aggregates: aggregates.age_histogram),
+    'regional_distribution': (draw_regional_distribution, (10, 6),
+                              lambda aggregates: aggregates.value_counts['customer_region']),
+    'purchase_by_category': (draw_purchase_by_category, (12, 6),
+                             lambda aggregates: aggregates.purchase_by_category),
+    'purchase_channel_distribution': (draw_purchase_channel_distribution, (10, 6),
+                                      lambda aggregates: aggregates.value_counts['purchase_channel']),
+    'rating_distribution': (draw_rating_distribution, (10, 6),
+                            lambda aggregates: aggregates.rating_counts),
+    'ratings_by_category': (draw_ratings_by_category, (12, 6),
+                            lambda aggregates: aggregates.rating_by_category),
+}
+
+
+def chart_data(aggregates, name):
+    """The pre-aggregated data chart `name` is drawn from."""
+    return CHARTS[name][2](aggregates)
+
+
+def render_chart(name, data, path):
+    """Draw one chart with the object-oriented API and save it as PNG."""
+    draw, figsize, _ = CHARTS[name]
+    # A bare Figure never touches pyplot, so no GUI backend is loaded
+    fig = Figure(figsize=figsize)
+    draw(fig, data)
+    fig.savefig(path)
+    return path
+
+
+def chart_workers(n_charts, workers=None):
+    """Worker processes worth starting for n_charts charts."""
+    return max(min(workers or os.cpu_count() or 1, n_charts), 1)
+
+
+def render_charts(jobs, output_dir, workers=None, executor=None):
+    """
+    Render {name: data} charts to `output_dir`/<name>.png. With more than
+    one worker to use (by default one per CPU, up to one per chart), they
+    are drawn concurrently in a process pool: `executor` if given, so one
+    pool can serve many calls, else a new one. Returns the written paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    names = list(jobs)
+    paths = [os.path.join(output_dir, f'{name}.png') for name in names]
+    data = [jobs[name] for name in names]
+    # Starting processes costs more than drawing a chart, so a single
+    # worker draws in this process
+    if chart_workers(len(names), workers) <= 1:
+        return list(map(render_chart, names, data, paths))
+    if executor is not None:
+        return list(executor.map(render_chart, names, data, paths))
+    with ProcessPoolExecutor(max_workers=chart_workers(len(names), workers)) as pool:
+        return list(pool.map(render_chart, names, data, paths))
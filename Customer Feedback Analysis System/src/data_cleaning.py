@@ -1,97 +1,442 @@
 import pandas as pd
 import numpy as np
+import tempfile
 from datetime import datetime
 
+from sketches import Moments, ModeSketch, QuantileSketch
+from dedup import DEFAULT_MAX_MEMORY, Deduplicator
+from storage import PartitionWriter, read_chunks, save_dataset, save_partitioned
+
 class DataCleaner:
+    """
+    Cleans a DataFrame through a chain of steps.
+
+    The cleaning methods only add a step to a plan. The plan runs on
+    execute(), and get_cleaning_summary(), save_cleaned_data() and reading
+    `df` run it too. Running the steps together lets them share statistics
+    (null counts, column means), handle all columns of a step in one call
+    and skip work that would change nothing.
+    """
     def __init__(self, df):
-        self.df = df.copy()
+        # The caller's frame is only copied before it would be modified or
+        # handed out
+        self.df = df
         self.original_shape = df.shape
-        
-    def remove_duplicates(self):
-        """Remove duplicate rows from the dataset."""
-        initial_rows = len(self.df)
-        self.df.drop_duplicates(inplace=True)
-        removed_rows = initial_rows - len(self.df)
-        print(f"Removed {removed_rows} duplicate rows")
+
+    @property
+    def df(self):
+        self.execute()
+        # Never hand out the caller's frame itself
+        self._own()
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        # A new frame starts a new plan with fresh statistics
+        self._df = df
+        self._owned = False
+        self.plan = []
+        self._null_counts = None
+        self._means = {}
+
+    def remove_duplicates(self, subset=None):
+        """Remove duplicate rows, or rows with a duplicate key if `subset` columns are given."""
+        self.plan.append((self._remove_duplicates, (subset,)))
         return self
-        
+
     def handle_missing_values(self, strategy='mean'):
         """
         Handle missing values in the dataset.
         strategy: 'mean', 'median', 'mode', or 'drop'
         """
-        for column in self.df.columns:
-            missing_count = self.df[column].isnull().sum()
-            if missing_count > 0:
-                print(f"\nHandling missing values in {column}:")
-                print(f"Missing values: {missing_count}")
-                
-                if strategy == 'drop':
-                    self.df.dropna(subset=[column], inplace=True)
-                elif strategy == 'mean' and pd.api.types.is_numeric_dtype(self.df[column]):
-                    self.df[column].fillna(self.df[column].mean(), inplace=True)
-                elif strategy == 'median' and pd.api.types.is_numeric_dtype(self.df[column]):
-                    self.df[column].fillna(self.df[column].median(), inplace=True)
-                elif strategy == 'mode':
-                    self.df[column].fillna(self.df[column].mode()[0], inplace=True)
-                
-                print(f"Missing values after cleaning: {self.df[column].isnull().sum()}")
+        self.plan.append((self._handle_missing_values, (strategy,)))
         return self
-        
+
     def handle_outliers(self, columns, method='iqr', threshold=1.5):
         """
         Handle outliers in specified columns using IQR method.
         method: 'iqr' or 'zscore'
         """
-        for column in columns:
-            if pd.api.types.is_numeric_dtype(self.df[column]):
-                if method == 'iqr':
-                    Q1 = self.df[column].quantile(0.25)
-                    Q3 = self.df[column].quantile(0.75)
-                    IQR = Q3 - Q1
-                    lower_bound = Q1 - threshold * IQR
-                    upper_bound = Q3 + threshold * IQR
-                    
-                    outliers = ((self.df[column] < lower_bound) | 
-                              (self.df[column] > upper_bound)).sum()
-                    print(f"\nOutliers in {column}: {outliers}")
-                    
-                    # Cap outliers
-                    self.df[column] = self.df[column].clip(lower_bound, upper_bound)
-                    
-                elif method == 'zscore':
-                    z_scores = np.abs((self.df[column] - self.df[column].mean()) / 
-                                    self.df[column].std())
-                    outliers = (z_scores > threshold).sum()
-                    print(f"\nOutliers in {column}: {outliers}")
-                    
-                    # Cap outliers
-                    self.df[column] = self.df[column].clip(
-                        self.df[column].mean() - threshold * self.df[column].std(),
-                        self.df[column].mean() + threshold * self.df[column].std()
-                    )
+        self.plan.append((self._handle_outliers, (list(columns), method, threshold)))
         return self
-        
+
     def standardize_dates(self, date_column):
         """Standardize date format in the specified column."""
-        self.df[date_column] = pd.to_datetime(self.df[date_column])
+        self.plan.append((self._standardize_dates, (date_column,)))
         return self
-        
+
+    def execute(self):
+        """Run the planned cleaning steps."""
+        plan, self.plan = self.plan, []
+        for step, args in plan:
+            step(*args)
+        return self
+
+    def _replace(self, df):
+        self._df = df
+        self._owned = True
+
+    def _own(self):
+        if not self._owned:
+            self._replace(self._df.copy())
+
+    def _get_null_counts(self):
+        if self._null_counts is None:
+            self._null_counts = self._df.isnull().sum()
+        return self._null_counts
+
+    def _mean(self, column):
+        if column not in self._means:
+            self._means[column] = self._df[column].mean()
+        return self._means[column]
+
+    def _remove_duplicates(self, subset):
+        duplicated = self._df.duplicated(subset=subset).to_numpy()
+        removed_rows = int(duplicated.sum())
+        if removed_rows:
+            self._replace(self._df.take(np.flatnonzero(~duplicated)))
+            self._null_counts = None
+            self._means = {}
+        print(f"Removed {removed_rows} duplicate rows")
+
+    def _handle_missing_values(self, strategy):
+        null_counts = self._get_null_counts()
+        missing = null_counts[null_counts > 0]
+        if missing.empty:
+            return
+
+        if strategy == 'drop':
+            # Rows are dropped column by column, so each column reports the
+            # values still missing after the earlier columns' drops
+            nulls = self._df[list(missing.index)].isnull().to_numpy()
+            dropped = np.logical_or.accumulate(nulls, axis=1)
+            first_null = nulls.copy()
+            first_null[:, 1:] &= ~dropped[:, :-1]
+            keep = ~dropped[:, -1]
+            missing = pd.Series(first_null.sum(axis=0), index=missing.index)
+            missing = missing[missing > 0]
+
+        fills = {}
+        for column, missing_count in missing.items():
+            print(f"\nHandling missing values in {column}:")
+            print(f"Missing values: {missing_count}")
+
+            is_numeric = pd.api.types.is_numeric_dtype(self._df[column])
+            if strategy == 'mean' and is_numeric:
+                fills[column] = self._mean(column)
+            elif strategy == 'median' and is_numeric:
+                fills[column] = self._df[column].median()
+            elif strategy == 'mode':
+                fills[column] = self._df[column].mode()[0]
+
+            cleaned = strategy == 'drop' or column in fills
+            print(f"Missing values after cleaning: {0 if cleaned else missing_count}")
+
+        if strategy == 'drop':
+            # Only the columns with missing values had any, so none are left
+            self._replace(self._df.take(np.flatnonzero(keep)))
+            self._null_counts = pd.Series(0, index=null_counts.index)
+            self._means = {}
+        elif fills:
+            self._replace(self._df.fillna(fills))
+            self._null_counts = null_counts.copy()
+            self._null_counts[list(fills)] = 0
+            # Filling with the mean leaves the mean as it was
+            if strategy != 'mean':
+                self._means = {c: m for c, m in self._means.items() if c not in fills}
+
+    def _handle_outliers(self, columns, method, threshold):
+        columns = [c for c in columns if pd.api.types.is_numeric_dtype(self._df[c])]
+        if not columns or method not in ('iqr', 'zscore'):
+            return
+        values = self._df[columns]
+
+        if method == 'iqr':
+            quartiles = values.quantile([0.25, 0.75])
+            Q1, Q3 = quartiles.loc[0.25], quartiles.loc[0.75]
+            IQR = Q3 - Q1
+            lower_bound = Q1 - threshold * IQR
+            upper_bound = Q3 + threshold * IQR
+        else:
+            mean = pd.Series({column: self._mean(column) for column in columns})
+            std = values.std()
+            lower_bound = mean - threshold * std
+            upper_bound = mean + threshold * std
+
+        outliers = ((values < lower_bound) | (values > upper_bound)).sum()
+        for column in columns:
+            print(f"\nOutliers in {column}: {outliers[column]}")
+
+        # Cap outliers; clipping a column without any would change nothing
+        to_cap = [column for column in columns if outliers[column]]
+        if to_cap:
+            self._own()
+            for column in to_cap:
+                self._df[column] = values[column].clip(lower_bound[column], upper_bound[column])
+                self._means.pop(column, None)
+
+    def _standardize_dates(self, date_column):
+        if not pd.api.types.is_datetime64_any_dtype(self._df[date_column]):
+            self._own()
+            self._df[date_column] = pd.to_datetime(self._df[date_column])
+
     def get_cleaning_summary(self):
         """Print summary of data cleaning operations."""
+        self.execute()
         print("\nData Cleaning Summary:")
         print(f"Original shape: {self.original_shape}")
-        print(f"Final shape: {self.df.shape}")
+        print(f"Final shape: {self._df.shape}")
         print("\nMissing values after cleaning:")
-        print(self.df.isnull().sum())
+        print(self._get_null_counts())
         return self
-        
-    def save_cleaned_data(self, filepath):
-        """Save cleaned data to CSV file."""
-        self.df.to_csv(filepath, index=False)
+
+    def save_cleaned_data(self, filepath, partition_by=None, date_column='date'):
+        """
+        Save cleaned data. A .parquet or .feather path stores it in columnar
+        form with compact dtypes, anything else is written as CSV.
+        With partition_by='day' or 'month', `filepath` is a directory of
+        Parquet files partitioned by `date_column`, plus a manifest.
+        """
+        self.execute()
+        if partition_by is not None:
+            save_partitioned(self._df, filepath, date_column=date_column, freq=partition_by)
+        else:
+            save_dataset(self._df, filepath)
         print(f"\nCleaned data saved to {filepath}")
         return self
 
+
+class ChunkedDataCleaner:
+    """
+    Streaming version of DataCleaner for data too large for memory.
+
+    `filepath` is one CSV/Parquet file or a list of them, cleaned as one
+    dataset. The cleaning methods only record what to do. save_cleaned_data
+    then reads the input twice: the first pass removes duplicates and
+    collects the statistics the steps need into mergeable sketches (mean,
+    mode counters, quantiles), the second pass cleans one chunk at a time
+    and appends it to the output. Memory use depends on the chunk size and
+    the duplicate-digest budget, not on the input size.
+
+    Steps are applied in the order duplicates, missing values, outliers,
+    dates, which is the order of the usual DataCleaner chain. Medians and
+    IQR bounds are exact up to the sketch size and approximate beyond it.
+    """
+    def __init__(self, filepath, chunksize=100_000, **read_csv_kwargs):
+        self.filepath = filepath
+        self.chunksize = chunksize
+        self.read_csv_kwargs = read_csv_kwargs
+        self.deduplicate = False
+        self.duplicate_subset = None
+        self.max_memory = DEFAULT_MAX_MEMORY
+        self.missing_strategy = None
+        self.outlier_columns = []
+        self.outlier_method = 'iqr'
+        self.outlier_threshold = 1.5
+        self.date_column = None
+        self.original_shape = None
+        self.final_shape = None
+        self.missing_after = None
+
+    def _read_chunks(self):
+        return read_chunks(self.filepath, self.chunksize, **self.read_csv_kwargs)
+
+    def remove_duplicates(self, subset=None, max_memory=DEFAULT_MAX_MEMORY):
+        """
+        Remove duplicate rows, or rows with a duplicate key if `subset`
+        columns are given. Row digests beyond `max_memory` bytes spill to disk.
+        """
+        self.deduplicate = True
+        self.duplicate_subset = subset
+        self.max_memory = max_memory
+        return self
+
+    def handle_missing_values(self, strategy='mean'):
+        """
+        Handle missing values in the dataset.
+        strategy: 'mean', 'median', 'mode', or 'drop'
+        """
+        self.missing_strategy = strategy
+        return self
+
+    def handle_outliers(self, columns, method='iqr', threshold=1.5):
+        """
+        Cap outliers in specified columns.
+        method: 'iqr' or 'zscore'
+        """
+        self.outlier_columns = list(columns)
+        self.outlier_method = method
+        self.outlier_threshold = threshold
+        return self
+
+    def standardize_dates(self, date_column):
+        """Standardize date format in the specified column."""
+        self.date_column = date_column
+        return self
+
+    def _collect_stats(self, keep_file):
+        """
+        First pass: row count, duplicates, missing counts, dtypes and column
+        sketches. Which rows survive deduplication goes to `keep_file`.
+        """
+        strategy = self.missing_strategy
+        rows = 0
+        missing = None
+        numeric, floating = {}, {}
+        moments, quantiles, modes = {}, {}, {}
+        deduplicator = (Deduplicator(self.duplicate_subset, self.max_memory)
+                        if self.deduplicate else None)
+
+        for chunk in self._read_chunks():
+            if missing is None:
+                missing = pd.Series(0, index=chunk.columns)
+                numeric = dict.fromkeys(chunk.columns, True)
+                floating = dict.fromkeys(chunk.columns, False)
+                moments = {column: Moments() for column in chunk.columns}
+                quantiles = {column: QuantileSketch() for column in chunk.columns}
+                modes = {column: ModeSketch() for column in chunk.columns}
+            rows += len(chunk)
+            for column in chunk.columns:
+                numeric[column] &= pd.api.types.is_numeric_dtype(chunk[column])
+                floating[column] |= pd.api.types.is_float_dtype(chunk[column])
+            if deduplicator is not None:
+                keep = deduplicator.keep_mask(chunk)
+                keep_file.write(np.packbits(keep).tobytes())
+                chunk = chunk[keep]
+            missing += chunk.isnull().sum()
+
+            # Statistics describe the data the later steps will see
+            if strategy == 'drop':
+                chunk = chunk.dropna()
+            if strategy == 'mode':
+                for column in chunk.columns:
+                    modes[column].update(chunk[column])
+            for column in chunk.columns:
+                if not numeric[column]:
+                    continue
+                values = chunk[column].to_numpy(dtype=float, na_value=np.nan)
+                if strategy == 'mean' or (column in self.outlier_columns
+                                          and self.outlier_method == 'zscore'):
+                    moments[column].update(values)
+                if strategy == 'median' or (column in self.outlier_columns
+                                            and self.outlier_method == 'iqr'):
+                    quantiles[column].update(values)
+
+        if deduplicator is not None:
+            deduplicator.close()
+            print(f"Removed {deduplicator.removed} duplicate rows")
+        if missing is None:
+            raise ValueError(f"{self.filepath} has no rows")
+        self.original_shape = (rows, len(missing))
+        return missing, numeric, floating, moments, quantiles, modes
+
+    def _plan(self, missing, numeric, moments, quantiles, modes):
+        """Turn the first-pass statistics into fill values and clip bounds."""
+        strategy = self.missing_strategy
+        fills = {}
+        for column, missing_count in missing.items():
+            if missing_count == 0 or strategy is None:
+                continue
+            print(f"\nHandling missing values in {column}:")
+            print(f"Missing values: {missing_count}")
+            if strategy == 'mean' and numeric[column]:
+                fills[column] = moments[column].mean
+            elif strategy == 'median' and numeric[column]:
+                fills[column] = quantiles[column].quantile(0.5)
+            elif strategy == 'mode' and modes[column].mode() is not None:
+                fills[column] = modes[column].mode()
+
+        bounds = {}
+        threshold = self.outlier_threshold
+        for column in self.outlier_columns:
+            if not numeric[column]:
+                continue
+            # Filled entries count towards the bounds, as they would in memory
+            extra = (fills[column], int(missing[column])) if column in fills else None
+            if self.outlier_method == 'iqr':
+                Q1 = quantiles[column].quantile(0.25, extra)
+                Q3 = quantiles[column].quantile(0.75, extra)
+                IQR = Q3 - Q1
+                bounds[column] = (Q1 - threshold * IQR, Q3 + threshold * IQR)
+            elif self.outlier_method == 'zscore':
+                stats = Moments().merge(moments[column])
+                if extra is not None:
+                    stats.add(*extra)
+                bounds[column] = (stats.mean - threshold * stats.std(),
+                                  stats.mean + threshold * stats.std())
+        return fills, bounds
+
+    def save_cleaned_data(self, filepath, partition_by=None, date_column='date'):
+        """
+        Run both passes and write the cleaned data to CSV chunk by chunk, or
+        with partition_by='day' or 'month' to a directory of Parquet files
+        partitioned by `date_column`.
+        """
+        writer = (PartitionWriter(filepath, date_column=date_column, freq=partition_by)
+                  if partition_by is not None else None)
+        with tempfile.TemporaryFile() as keep_file:
+            missing, numeric, floating, moments, quantiles, modes = self._collect_stats(keep_file)
+            keep_file.seek(0)
+            self._clean_chunks(filepath, keep_file, missing, numeric, floating,
+                               moments, quantiles, modes, writer)
+        if writer is not None:
+            writer.close()
+        print(f"\nCleaned data saved to {filepath}")
+        return self
+
+    def _clean_chunks(self, filepath, keep_file, missing, numeric, floating,
+                      moments, quantiles, modes, writer=None):
+        """Second pass: clean every chunk and append it to `filepath` (or `writer`)."""
+        fills, bounds = self._plan(missing, numeric, moments, quantiles, modes)
+        # Columns that are float anywhere are float everywhere, so every
+        # chunk formats them the same way
+        float_columns = [column for column, is_float in floating.items()
+                         if is_float and numeric[column]]
+
+        rows = 0
+        missing_after = pd.Series(0, index=missing.index)
+        outliers = dict.fromkeys(bounds, 0)
+        for i, chunk in enumerate(self._read_chunks()):
+            if self.deduplicate:
+                n_rows = len(chunk)
+                bits = np.frombuffer(keep_file.read((n_rows + 7) // 8), dtype=np.uint8)
+                chunk = chunk.take(np.flatnonzero(np.unpackbits(bits, count=n_rows)))
+            chunk[float_columns] = chunk[float_columns].astype(float)
+            if self.missing_strategy == 'drop':
+                chunk = chunk.dropna().copy()
+            elif fills:
+                chunk = chunk.fillna(fills)
+            for column, (lower_bound, upper_bound) in bounds.items():
+                outliers[column] += ((chunk[column] < lower_bound) |
+                                     (chunk[column] > upper_bound)).sum()
+                chunk[column] = chunk[column].clip(lower_bound, upper_bound)
+            if self.date_column is not None:
+                chunk[self.date_column] = pd.to_datetime(chunk[self.date_column])
+
+            rows += len(chunk)
+            missing_after += chunk.isnull().sum()
+            if writer is not None:
+                writer.write(chunk)
+            else:
+                chunk.to_csv(filepath, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+
+        for column, count in outliers.items():
+            print(f"\nOutliers in {column}: {count}")
+        self.final_shape = (rows, len(missing))
+        self.missing_after = missing_after
+
+    def get_cleaning_summary(self):
+        """Print summary of data cleaning operations (after saving)."""
+        if self.final_shape is None:
+            print("\nNo summary yet: the data is cleaned by save_cleaned_data")
+            return self
+        print("\nData Cleaning Summary:")
+        print(f"Original shape: {self.original_shape}")
+        print(f"Final shape: {self.final_shape}")
+        print("\nMissing values after cleaning:")
+        print(self.missing_after)
+        return self
+
 if __name__ == "__main__":
     # Load the data
     df = pd.read_csv('../data/customer_feedback.csv')
@@ -105,4 +450,4 @@ if __name__ == "__main__":
            .handle_outliers(columns=['purchase_amount', 'customer_age'])\
            .standardize_dates('date')\
            .get_cleaning_summary()\
-           .save_cleaned_data('../data/cleaned_customer_feedback.csv') 
\ No newline at end of file
+           .save_cleaned_data('../data/cleaned_customer_feedback.parquet') 
\ No newline at end of file
@@ -1,49 +1,129 @@
+import argparse
+import glob
+import multiprocessing
+import os
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import random
 
-def generate_customer_feedback_data(n_samples=1000):
+from storage import save_dataset
+
+CATEGORIES = ['Electronics', 'Clothing', 'Home', 'Books', 'Sports']
+REGIONS = ['North', 'South', 'East', 'West']
+CHANNELS = ['Online', 'Store', 'Mobile']
+HISTORY_DAYS = 180
+CHUNK_SIZE = 1_000_000
+
+def _default_end_date():
+    # Midnight today, so runs on the same day produce the same dates
+    return datetime.combine(datetime.now().date(), datetime.min.time())
+
+def generate_chunk(seed, chunk_index, start, n_rows, end_date):
     """
-    Generate synthetic customer feedback data for demonstration purposes.
+    Generate rows start..start+n_rows-1 of a dataset.
+
+    Every chunk draws from its own Generator derived from `seed` and the
+    chunk index, so a chunk comes out the same no matter which process
+    generates it or in what order.
     """
-    # Set random seed for reproducibility
-    np.random.seed(42)
-    
-    # Generate dates for the last 6 months
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=180)
-    dates = [start_date + timedelta(days=x) for x in range((end_date - start_date).days)]
-    
-    # Generate data
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+    ids = pd.Series(np.arange(start, start + n_rows)).astype(str)
+    start_date = end_date - timedelta(days=HISTORY_DAYS)
+
+    rating = rng.integers(1, 6, n_rows).astype(float)
+    purchase_amount = rng.normal(100, 30, n_rows).round(2)
     data = {
-        'customer_id': [f'CUST_{i:04d}' for i in range(n_samples)],
-        'date': [random.choice(dates) for _ in range(n_samples)],
-        'product_category': np.random.choice(['Electronics', 'Clothing', 'Home', 'Books', 'Sports'], n_samples),
-        'purchase_amount': np.random.normal(100, 30, n_samples).round(2),
-        'rating': np.random.randint(1, 6, n_samples),
-        'feedback_text': [f"Sample feedback {i}" for i in range(n_samples)],
-        'customer_age': np.random.randint(18, 80, n_samples),
-        'customer_region': np.random.choice(['North', 'South', 'East', 'West'], n_samples),
-        'purchase_channel': np.random.choice(['Online', 'Store', 'Mobile'], n_samples)
+        'customer_id': ('CUST_' + ids.str.zfill(4)).to_numpy(dtype=object),
+        'date': pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, HISTORY_DAYS, n_rows), unit='D'),
+        'product_category': rng.choice(CATEGORIES, n_rows).astype(object),
+        'purchase_amount': purchase_amount,
+        'rating': rating,
+        'feedback_text': ('Sample feedback ' + ids).to_numpy(dtype=object, copy=True),
+        'customer_age': rng.integers(18, 80, n_rows),
+        'customer_region': rng.choice(REGIONS, n_rows).astype(object),
+        'purchase_channel': rng.choice(CHANNELS, n_rows).astype(object),
     }
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
+
     # Introduce some missing values
-    df.loc[df.sample(frac=0.1).index, 'rating'] = np.nan
-    df.loc[df.sample(frac=0.05).index, 'feedback_text'] = np.nan
-    
+    rating[rng.choice(n_rows, round(0.1 * n_rows), replace=False)] = np.nan
+    data['feedback_text'][rng.choice(n_rows, round(0.05 * n_rows), replace=False)] = np.nan
+
     # Introduce some outliers
-    df.loc[df.sample(frac=0.02).index, 'purchase_amount'] *= 5
-    
+    purchase_amount[rng.choice(n_rows, round(0.02 * n_rows), replace=False)] *= 5
+
+    return pd.DataFrame(data, index=pd.RangeIndex(start, start + n_rows))
+
+def generate_customer_feedback_data(n_samples=1000, seed=42, end_date=None,
+                                    filepath='../data/customer_feedback.csv'):
+    """
+    Generate synthetic customer feedback data for demonstration purposes.
+    """
+    end_date = end_date or _default_end_date()
+    df = generate_chunk(seed, 0, 0, n_samples, end_date).reset_index(drop=True)
+
     # Save to CSV
-    df.to_csv('../data/customer_feedback.csv', index=False)
+    df.to_csv(filepath, index=False)
     print(f"Generated {n_samples} samples of customer feedback data")
     return df
 
+def _write_shard(task):
+    seed, chunk_index, start, n_rows, end_date, path = task
+    save_dataset(generate_chunk(seed, chunk_index, start, n_rows, end_date), path)
+    return path, n_rows
+
+def generate_dataset(n_samples, output_dir, seed=42, file_format='csv', chunk_size=CHUNK_SIZE,
+                     workers=None, end_date=None):
+    """
+    Generate a large dataset as shards of `chunk_size` rows, written by
+    `workers` processes straight to `output_dir`. The output only depends
+    on seed, n_samples, chunk_size and end_date.
+    file_format: 'csv' or 'parquet'
+    """
+    end_date = end_date or _default_end_date()
+    os.makedirs(output_dir, exist_ok=True)
+    # Shards of an earlier, larger run would otherwise look like part of this one
+    for old_shard in glob.glob(os.path.join(output_dir, 'customer_feedback-*.*')):
+        os.remove(old_shard)
+
+    tasks = []
+    for chunk_index, start in enumerate(range(0, n_samples, chunk_size)):
+        path = os.path.join(output_dir, f'customer_feedback-{chunk_index:05d}.{file_format}')
+        tasks.append((seed, chunk_index, start, min(chunk_size, n_samples - start), end_date, path))
+
+    if workers == 1:
+        results = map(_write_shard, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap(_write_shard, tasks)
+    try:
+        for path, n_rows in results:
+            print(f"Wrote {n_rows} rows to {path}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    print(f"Generated {n_samples} samples of customer feedback data in {len(tasks)} shards")
+    return [task[-1] for task in tasks]
+
 if __name__ == "__main__":
-    df = generate_customer_feedback_data()
-    print("\nSample of generated data:")
-    print(df.head()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate synthetic customer feedback data")
+    parser.add_argument('--rows', type=int, help="generate a sharded dataset of this many rows")
+    parser.add_argument('--output-dir', default='../data/generated')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, help="worker processes (default: all CPUs)")
+    parser.add_argument('--end-date', type=datetime.fromisoformat,
+                        help="last day of the feedback period, YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    if args.rows is None:
+        df = generate_customer_feedback_data(seed=args.seed, end_date=args.end_date)
+        print("\nSample of generated data:")
+        print(df.head())
+    else:
+        generate_dataset(args.rows, args.output_dir, seed=args.seed, file_format=args.format,
+                         chunk_size=args.chunk_size, workers=args.workers, end_date=args.end_date)
@@ -0,0 +1,246 @@
+"""
+Streaming duplicate removal for data larger than memory.
+
+Every row (or a key subset of its columns) is reduced to a 64-bit digest.
+Digests seen so far live in a sorted array; once that passes the memory
+budget it is written to disk as a sorted run and searched through a memory
+map, so only the newest digests take RAM. With 64-bit digests, the chance
+of two distinct rows colliding anywhere in a billion rows is about 3%.
+
+    python dedup.py part-1.csv part-2.csv -o deduplicated.csv --subset customer_id date
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from storage import read_chunks
+
+DEFAULT_MAX_MEMORY = 256 * 2**20
+
+
+# Tags of a numeric value's kind, hashed along with its 64 bits
+_INT, _FLOAT, _MISSING, _LARGE_UINT = 0, 1, 2, 3
+
+
+def _numeric_key(values):
+    """
+    (payload, tag) arrays of a numeric column. Integers keep all 64 bits,
+    and a float holding a whole number is mapped onto the same integer, so
+    a column that is int in one chunk and float (with NaN) in the next
+    gives the same key for the same value.
+    """
+    missing = values.isna().to_numpy()
+    tags = np.full(len(values), _INT, dtype=np.uint8)
+    if pd.api.types.is_integer_dtype(values):
+        if pd.api.types.is_unsigned_integer_dtype(values):
+            payload = values.to_numpy(dtype=np.uint64, na_value=0)
+            tags[payload > np.iinfo(np.int64).max] = _LARGE_UINT
+        else:
+            payload = values.to_numpy(dtype=np.int64, na_value=0).view(np.uint64)
+    else:
+        floats = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            whole = ((floats == np.floor(floats)) & (floats >= -2.0**63) & (floats < 2.0**63))
+        payload = floats.view(np.uint64).copy()
+        payload[whole] = floats[whole].astype(np.int64).view(np.uint64)
+        tags[~whole] = _FLOAT
+    payload[missing] = 0
+    tags[missing] = _MISSING
+    return payload, tags
+
+
+def row_digests(df, subset=None):
+    """64-bit digest of every row of df, or of its `subset` columns."""
+    if subset is not None:
+        df = df[list(subset)]
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            payload, tags = _numeric_key(values)
+            columns[(column, 'payload')] = payload
+            columns[(column, 'tag')] = tags
+        else:
+            columns[column] = values
+    return pd.util.hash_pandas_object(pd.DataFrame(columns, index=df.index),
+                                      index=False).to_numpy()
+
+
+def _isin_sorted(sorted_digests, digests):
+    if not len(sorted_digests):
+        return np.zeros(len(digests), dtype=bool)
+    positions = np.searchsorted(sorted_digests, digests)
+    positions[positions == len(sorted_digests)] = 0
+    return np.asarray(sorted_digests[positions]) == digests
+
+
+def _merge_sorted(arrays):
+    # Stable sort is timsort for 64-bit integers: it finds the sorted runs
+    # and merges them, in linear time for two runs
+    return np.sort(np.concatenate(arrays), kind='stable')
+
+
+def _merge_runs_to_file(runs, path, block_items):
+    """
+    Merge sorted arrays (or memory maps) into one sorted file, holding at
+    most `block_items` values of each run in memory at a time.
+    """
+    positions = [0] * len(runs)
+    with open(path, 'wb') as out:
+        while True:
+            blocks = [run[pos:pos + block_items] for run, pos in zip(runs, positions)]
+            if not any(len(block) for block in blocks):
+                return
+            # Values up to the smallest last value of a run that continues past
+            # its block can't be preceded by anything not read yet
+            ends = [block[-1] for block, run, pos in zip(blocks, runs, positions)
+                    if pos + len(block) < len(run)]
+            cutoff = min(ends) if ends else None
+            taken = []
+            for i, block in enumerate(blocks):
+                n = len(block) if cutoff is None else int(np.searchsorted(block, cutoff, side='right'))
+                taken.append(np.asarray(block[:n]))
+                positions[i] += n
+            _merge_sorted(taken).tofile(out)
+
+
+class DigestSet:
+    """
+    Set of uint64 digests that keeps at most `max_memory` bytes of them in
+    RAM and spills the rest to sorted run files in `spill_dir`.
+
+    In memory, digests are kept as a few sorted runs of geometrically
+    decreasing size, merged like a binary counter, so adding a batch costs
+    time in proportion to the batch (amortized). On disk, every
+    `run_fanout` runs of the same level are merged into one run of the
+    next level, so lookups only search a handful of runs.
+    """
+
+    def __init__(self, max_memory=DEFAULT_MAX_MEMORY, spill_dir=None, run_fanout=4):
+        self.max_items = max(max_memory // 8, 1)
+        self.run_fanout = run_fanout
+        self.memory = []
+        self.runs = []
+        self.spill_dir = spill_dir
+        self._tmpdir = None
+        self._files = 0
+
+    def __len__(self):
+        return sum(len(run) for run in self.memory) + sum(len(run) for _, run, _ in self.runs)
+
+    def contains(self, digests):
+        found = np.zeros(len(digests), dtype=bool)
+        for run in self.memory:
+            found |= _isin_sorted(run, digests)
+        for _, run, _ in self.runs:
+            found |= _isin_sorted(run, digests)
+        return found
+
+    def add(self, digests):
+        """Add digests that are not in the set yet."""
+        self.memory.append(np.sort(digests))
+        # Merge while a run is no more than twice the size of the one after it
+        while len(self.memory) >= 2 and len(self.memory[-2]) <= 2 * len(self.memory[-1]):
+            last = self.memory.pop()
+            self.memory[-1] = _merge_sorted([self.memory[-1], last])
+        if sum(len(run) for run in self.memory) >= self.max_items:
+            self._spill()
+
+    def _new_path(self):
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix='dedup-', dir=self.spill_dir)
+        self._files += 1
+        return os.path.join(self._tmpdir.name, f'run-{self._files:05d}.u64')
+
+    def _spill(self):
+        path = self._new_path()
+        _merge_sorted(self.memory).tofile(path)
+        self.memory = []
+        self.runs.append((0, np.memmap(path, dtype=np.uint64, mode='r'), path))
+        self._compact()
+
+    def _compact(self):
+        """Merge every `run_fanout` runs of a level into one of the next level."""
+        while True:
+            levels = sorted({level for level, _, _ in self.runs})
+            full = [level for level in levels
+                    if sum(run_level == level for run_level, _, _ in self.runs) >= self.run_fanout]
+            if not full:
+                return
+            level = full[0]
+            group = [run for run in self.runs if run[0] == level]
+            path = self._new_path()
+            _merge_runs_to_file([run for _, run, _ in group], path,
+                               max(self.max_items // (2 * len(group)), 1024))
+            self.runs = [run for run in self.runs if run[0] != level]
+            for _, _, old_path in group:
+                os.remove(old_path)
+            self.runs.append((level + 1, np.memmap(path, dtype=np.uint64, mode='r'), path))
+
+    def close(self):
+        self.memory = []
+        self.runs = []
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+
+class Deduplicator:
+    """
+    Drops rows whose digest was already seen, across any number of chunks
+    and files. The first occurrence is kept, as with drop_duplicates().
+    """
+
+    def __init__(self, subset=None, max_memory=DEFAULT_MAX_MEMORY, spill_dir=None):
+        self.subset = subset
+        self.seen = DigestSet(max_memory, spill_dir)
+        self.removed = 0
+
+    def keep_mask(self, chunk):
+        """Boolean mask of the rows of `chunk` seen for the first time."""
+        digests = row_digests(chunk, self.subset)
+        first_in_chunk = ~pd.Series(digests).duplicated().to_numpy()
+        keep = first_in_chunk & ~self.seen.contains(digests)
+        self.seen.add(digests[keep])
+        self.removed += int(len(chunk) - keep.sum())
+        return keep
+
+    def deduplicate(self, chunk):
+        return chunk[self.keep_mask(chunk)]
+
+    def close(self):
+        self.seen.close()
+
+
+def deduplicate_files(paths, output, subset=None, chunksize=100_000,
+                      max_memory=DEFAULT_MAX_MEMORY, spill_dir=None):
+    """Write the rows of `paths` (CSV or Parquet) to CSV `output` without duplicates."""
+    deduplicator = Deduplicator(subset, max_memory, spill_dir)
+    rows = 0
+    try:
+        for i, chunk in enumerate(read_chunks(paths, chunksize)):
+            chunk = deduplicator.deduplicate(chunk)
+            rows += len(chunk)
+            chunk.to_csv(output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    finally:
+        deduplicator.close()
+    print(f"Removed {deduplicator.removed} duplicate rows, kept {rows}")
+    return deduplicator.removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate rows from large files")
+    parser.add_argument('inputs', nargs='+', help="CSV or Parquet files, read in order")
+    parser.add_argument('-o', '--output', required=True, help="output CSV file")
+    parser.add_argument('--subset', nargs='+', help="key columns (default: whole rows)")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--max-memory-mb', type=int, default=DEFAULT_MAX_MEMORY // 2**20,
+                        help="digest memory before spilling to disk")
+    parser.add_argument('--spill-dir', help="directory for spilled digests (default: system temp)")
+    args = parser.parse_args()
+
+    deduplicate_files(args.inputs, args.output, subset=args.subset, chunksize=args.chunksize,
+                      max_memory=args.max_memory_mb * 2**20, spill_dir=args.spill_dir)
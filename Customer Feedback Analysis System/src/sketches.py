@@ -0,0 +1,299 @@
+import numpy as np
+
+
+class Moments:
+    """Mergeable count, mean, variance (Chan et al. parallel update), min and max."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float('nan')
+        self.max = float('nan')
+
+    def update(self, values):
+        """Add a batch of values, ignoring NaN."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            other = Moments()
+            other.count = len(values)
+            other.mean = float(values.mean())
+            other.m2 = float(((values - other.mean) ** 2).sum())
+            other.min = float(values.min())
+            other.max = float(values.max())
+            self.merge(other)
+        return self
+
+    def add(self, value, count):
+        """Add `count` copies of a single value."""
+        if count:
+            other = Moments()
+            other.count = count
+            other.mean = other.min = other.max = float(value)
+            self.merge(other)
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        # fmin/fmax skip the NaN of an empty side
+        self.min = float(np.fmin(self.min, other.min))
+        self.max = float(np.fmax(self.max, other.max))
+        return self
+
+    def std(self, ddof=1):
+        if self.count <= ddof:
+            return float('nan')
+        return (self.m2 / (self.count - ddof)) ** 0.5
+
+
+class CoMoments:
+    """
+    Mergeable pairwise co-moments of k columns, for a correlation matrix.
+
+    Like DataFrame.corr(), each pair only uses the rows where both values
+    are present, so every pair keeps its own count, means and sums of
+    squared deviations.
+    """
+
+    def __init__(self, k):
+        self.count = np.zeros((k, k))
+        self.mean_x = np.zeros((k, k))
+        self.mean_y = np.zeros((k, k))
+        self.c_xy = np.zeros((k, k))
+        self.m2_x = np.zeros((k, k))
+        self.m2_y = np.zeros((k, k))
+
+    def update(self, values):
+        """Add the rows of a (n, k) float array with NaN for missing values."""
+        values = np.asarray(values, dtype=float)
+        present = ~np.isnan(values)
+        other = CoMoments(values.shape[1])
+        for i in range(values.shape[1]):
+            for j in range(i, values.shape[1]):
+                both = present[:, i] & present[:, j]
+                n = both.sum()
+                if n == 0:
+                    continue
+                x, y = values[both, i], values[both, j]
+                dx, dy = x - x.mean(), y - y.mean()
+                stats = n, x.mean(), y.mean(), (dx * dy).sum(), (dx * dx).sum(), (dy * dy).sum()
+                for matrix, value in zip((other.count, other.mean_x, other.mean_y,
+                                          other.c_xy, other.m2_x, other.m2_y), stats):
+                    matrix[i, j] = value
+        return self.merge(other)
+
+    def merge(self, other):
+        total = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, other.count / total, 0.0)
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        cross = self.count * weight
+        self.c_xy += other.c_xy + dx * dy * cross
+        self.m2_x += other.m2_x + dx * dx * cross
+        self.m2_y += other.m2_y + dy * dy * cross
+        self.mean_x += dx * weight
+        self.mean_y += dy * weight
+        self.count = total
+        return self
+
+    def correlation(self):
+        """The (k, k) Pearson correlation matrix."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            upper = self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+        upper[self.count < 2] = np.nan
+        upper = np.triu(upper)
+        corr = upper + np.triu(upper, 1).T
+        np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+        return corr
+
+
+class ModeSketch:
+    """
+    Mergeable most-frequent-value counter.
+
+    Exact while a column has at most `capacity` distinct values. Beyond that
+    it keeps the `capacity` most frequent values seen so far, which is
+    enough to find the mode of any column where one value stands out.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, series):
+        self.merge_counts(series.value_counts(dropna=True).to_dict())
+        return self
+
+    def merge(self, other):
+        self.merge_counts(other.counts)
+        return self
+
+    def merge_counts(self, counts):
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            # Ties keep the smaller value, the one mode() would report
+            top = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+            self.counts = dict(top[:self.capacity])
+
+    def mode(self):
+        """Most frequent value; ties go to the smallest, like Series.mode()[0]."""
+        if not self.counts:
+            return None
+        top = max(self.counts.values())
+        return min(v for v, c in self.counts.items() if c == top)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (KLL-style compactors).
+
+    Level h holds items that each stand for 2**h values. While fewer than
+    `k` values have been added nothing is compacted and quantiles are exact,
+    with the same linear interpolation as pandas.
+    """
+
+    def __init__(self, k=2048, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def count(self):
+        return sum(len(items) << h for h, items in enumerate(self.levels))
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values):
+        """Add a batch of values, ignoring NaN."""
+        values = np.asarray(values, dtype=float)
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self._capacity(h):
+                items = np.sort(items)
+                # An odd item out stays at this level
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[self.rng.integers(2)::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def values(self):
+        """The values the sketch currently keeps, a sample of everything added."""
+        return np.concatenate(self.levels)
+
+    def quantile(self, q, extra=None):
+        """
+        Estimate the q-quantile (linear interpolation between order stats).
+
+        extra: optional (value, count) added to the data for this estimate,
+               e.g. the fill value of the missing entries.
+        """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64)
+                                  for h, level in enumerate(self.levels)])
+        if extra is not None and extra[1]:
+            items = np.append(items, float(extra[0]))
+            weights = np.append(weights, int(extra[1]))
+        if not len(items):
+            return float('nan')
+        order = np.argsort(items, kind='stable')
+        items, cum = items[order], np.cumsum(weights[order])
+
+        position = q * (cum[-1] - 1)
+        lower = int(np.floor(position))
+        lo_value = items[np.searchsorted(cum, lower, side='right')]
+        hi_value = items[np.searchsorted(cum, min(lower + 1, cum[-1] - 1), side='right')]
+        return lo_value + (hi_value - lo_value) * (position - lower)
+
+
+class Tails:
+    """
+    Mergeable exact `k` smallest and `k` largest values, each kept sorted.
+    Box plot fliers lie in the tails, so they are exact while each side has
+    at most `k`.
+    """
+
+    def __init__(self, k=10_000):
+        self.k = k
+        self.count = 0
+        self.low = np.empty(0)
+        self.high = np.empty(0)
+
+    def update(self, values):
+        """Add a batch of values, ignoring NaN."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.low = self._smallest(np.concatenate([self.low, values]))
+        self.high = -self._smallest(-np.concatenate([self.high, values]))[::-1]
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.low = self._smallest(np.concatenate([self.low, other.low]))
+        self.high = -self._smallest(-np.concatenate([self.high, other.high]))[::-1]
+        return self
+
+    def _smallest(self, values):
+        if len(values) > self.k:
+            values = np.partition(values, self.k - 1)[:self.k]
+        return np.sort(values)
+
+    def below(self, limit):
+        """Every value < limit, or None if the tail may not hold them all."""
+        if self.count > len(self.low) and (not len(self.low) or self.low[-1] < limit):
+            return None
+        return self.low[self.low < limit]
+
+    def above(self, limit):
+        """Every value > limit, or None if the tail may not hold them all."""
+        if self.count > len(self.high) and (not len(self.high) or self.high[0] > limit):
+            return None
+        return self.high[self.high > limit]
+
+
+class Histogram:
+    """Mergeable fixed-bin histogram."""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        counts, _ = np.histogram(values[~np.isnan(values)], bins=self.edges)
+        self.counts += counts
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
@@ -0,0 +1,322 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Anything else is read and written as CSV
+COLUMNAR_FORMATS = {'.parquet': 'parquet', '.feather': 'feather'}
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+MANIFEST = '_manifest.json'
+PARTITION_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m'}
+# Columns with at most this many distinct values in a part have them listed
+# in the manifest, so filters on them can skip the part
+MAX_MANIFEST_VALUES = 100
+
+
+def file_format(filepath):
+    """Return 'csv', 'parquet' or 'feather' based on the file extension."""
+    extension = os.path.splitext(filepath)[1].lower()
+    return COLUMNAR_FORMATS.get(extension, 'csv')
+
+
+def optimize_dtypes(df, max_category_ratio=0.5):
+    """
+    Return df with compact dtypes for columnar storage.
+
+    String columns with few distinct values become categories, integers are
+    downcast to the smallest type that holds them and floats become float32
+    when that loses nothing.
+    """
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_object_dtype(values):
+            if values.nunique() <= max_category_ratio * len(values):
+                values = values.astype('category')
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_float_dtype(values):
+            small = values.astype(np.float32)
+            if np.array_equal(small.to_numpy(), values.to_numpy(), equal_nan=True):
+                values = small
+        columns[column] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def save_dataset(df, filepath):
+    """Save df as CSV, or as Parquet/Feather with optimized dtypes."""
+    fmt = file_format(filepath)
+    if fmt == 'parquet':
+        optimize_dtypes(df).to_parquet(filepath, index=False)
+    elif fmt == 'feather':
+        optimize_dtypes(df).reset_index(drop=True).to_feather(filepath)
+    else:
+        df.to_csv(filepath, index=False)
+
+
+def load_dataset(filepath, columns=None):
+    """
+    Load a dataset saved by save_dataset, or a partitioned directory written
+    by PartitionWriter, reading only `columns` if given.
+    """
+    if os.path.isdir(filepath):
+        return load_partitioned(filepath, columns=columns)
+    fmt = file_format(filepath)
+    if fmt == 'parquet':
+        return pd.read_parquet(filepath, columns=columns)
+    if fmt == 'feather':
+        return pd.read_feather(filepath, columns=columns)
+    return pd.read_csv(filepath, usecols=columns)
+
+
+def read_chunks(paths, chunksize, **read_csv_kwargs):
+    """Yield DataFrame chunks of one or more CSV/Parquet files, in order."""
+    for path in [paths] if isinstance(paths, str) else paths:
+        if file_format(path) == 'parquet':
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs)
+
+
+def dataset_columns(filepath):
+    """Every column of a dataset saved by save_dataset or PartitionWriter, read from its header."""
+    if os.path.isdir(filepath):
+        return list(read_manifest(filepath)['columns'])
+    fmt = file_format(filepath)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return [name for name in pq.read_schema(filepath).names
+                if not name.startswith('__index_level_')]
+    if fmt == 'feather':
+        import pyarrow as pa
+        with pa.memory_map(filepath) as source:
+            return pa.ipc.open_file(source).schema.names
+    return list(pd.read_csv(filepath, nrows=0).columns)
+
+
+def null_counts(filepath, columns=None, chunksize=1_000_000):
+    """
+    Missing values per column (all of them by default) of a dataset saved by
+    save_dataset or PartitionWriter. Parquet counts come from the row group
+    statistics, so no values are read; Feather columns are read as Arrow
+    tables and CSV columns in chunks.
+    """
+    columns = dataset_columns(filepath) if columns is None else list(columns)
+    counts = pd.Series(0, index=columns, dtype='int64')
+    if not columns:
+        return counts
+    if os.path.isdir(filepath):
+        for part in read_manifest(filepath)['parts']:
+            counts += null_counts(os.path.join(filepath, part['path']), columns, chunksize)
+        return counts
+    fmt = file_format(filepath)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(filepath)
+        metadata = parquet_file.metadata
+        unknown = set()
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                chunk = row_group.column(j)
+                if chunk.path_in_schema not in counts.index:
+                    continue
+                if chunk.statistics is not None and chunk.statistics.has_null_count:
+                    counts[chunk.path_in_schema] += chunk.statistics.null_count
+                else:
+                    unknown.add(chunk.path_in_schema)
+        # Files written without statistics have those columns read
+        if unknown:
+            table = parquet_file.read(columns=sorted(unknown))
+            for column in unknown:
+                counts[column] = table.column(column).null_count
+        return counts
+    if fmt == 'feather':
+        import pyarrow as pa
+        with pa.memory_map(filepath) as source:
+            table = pa.ipc.open_file(source).read_all().select(columns)
+            for column in columns:
+                counts[column] = table.column(column).null_count
+        return counts
+    for chunk in pd.read_csv(filepath, usecols=columns, chunksize=chunksize):
+        counts += chunk.isnull().sum()
+    return counts
+
+
+def _json_value(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _describe_part(part):
+    """Min/max of numeric and date columns and distinct values of the others."""
+    minimum, maximum, values = {}, {}, {}
+    for column in part.columns:
+        series = part[column].dropna()
+        if not len(series):
+            continue
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            if not pd.api.types.is_bool_dtype(series):
+                minimum[column] = _json_value(series.min())
+                maximum[column] = _json_value(series.max())
+        else:
+            distinct = series.unique()
+            if len(distinct) <= MAX_MANIFEST_VALUES:
+                values[column] = sorted(_json_value(value) for value in distinct)
+    return {'min': minimum, 'max': maximum, 'values': values}
+
+
+class PartitionWriter:
+    """
+    Writes a dataset under `root` partitioned by `date_column`, one
+    directory per day or month (root/date=2024-06/part-00000.parquet), and
+    a manifest with the row count and column statistics of every part.
+    Chunks can be written one at a time; the manifest is written by close().
+    Rows without a date go to the date=null partition.
+    """
+
+    def __init__(self, root, date_column='date', freq='month', file_format='parquet'):
+        if freq not in PARTITION_FORMATS:
+            raise ValueError(f"freq must be one of {list(PARTITION_FORMATS)}")
+        self.root = root
+        self.date_column = date_column
+        self.freq = freq
+        self.file_format = file_format
+        self.columns = None
+        self.parts = []
+
+        # Replace an earlier dataset in the same place
+        manifest_path = os.path.join(root, MANIFEST)
+        if os.path.exists(manifest_path):
+            for part in read_manifest(root)['parts']:
+                path = os.path.join(root, part['path'])
+                if os.path.exists(path):
+                    os.remove(path)
+            os.remove(manifest_path)
+        os.makedirs(root, exist_ok=True)
+
+    def write(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+        dates = pd.to_datetime(df[self.date_column])
+        keys = dates.dt.strftime(PARTITION_FORMATS[self.freq]).fillna('null')
+        # Store the parsed dates, so the manifest has their min/max for pruning
+        # even when the dates weren't standardized beforehand
+        df = df.assign(**{self.date_column: dates})
+        for key, part in df.groupby(keys.to_numpy(), sort=True):
+            path = f'{self.date_column}={key}/part-{len(self.parts):05d}{EXTENSIONS[self.file_format]}'
+            os.makedirs(os.path.join(self.root, os.path.dirname(path)), exist_ok=True)
+            save_dataset(part, os.path.join(self.root, path))
+            self.parts.append({'partition': key, 'path': path, 'rows': len(part),
+                               **_describe_part(part)})
+        return self
+
+    def close(self):
+        """Write the manifest atomically."""
+        manifest = {'date_column': self.date_column, 'freq': self.freq,
+                    'columns': self.columns, 'parts': self.parts}
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=1)
+            os.replace(tmp_path, os.path.join(self.root, MANIFEST))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return manifest
+
+
+def save_partitioned(df, root, date_column='date', freq='month', file_format='parquet'):
+    """Save df partitioned by day or month of `date_column`; see PartitionWriter."""
+    return PartitionWriter(root, date_column, freq, file_format).write(df).close()
+
+
+def read_manifest(root):
+    with open(os.path.join(root, MANIFEST)) as f:
+        return json.load(f)
+
+
+def _as_list(values):
+    return [values] if isinstance(values, str) or not np.iterable(values) else list(values)
+
+
+def select_parts(manifest, start=None, end=None, filters=None):
+    """
+    Parts that may hold rows with start <= date <= end and, for every
+    column in `filters`, one of the given values. Decided from the manifest
+    alone.
+    """
+    date_column = manifest['date_column']
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    selected = []
+    for part in manifest['parts']:
+        if start is not None or end is not None:
+            if date_column not in part['min']:
+                continue
+            if start is not None and pd.Timestamp(part['max'][date_column]) < start:
+                continue
+            if end is not None and pd.Timestamp(part['min'][date_column]) > end:
+                continue
+        # A column without listed values can't be ruled out
+        if any(column in part['values'] and not set(part['values'][column]) & set(_as_list(wanted))
+               for column, wanted in (filters or {}).items()):
+            continue
+        selected.append(part)
+    return selected
+
+
+def load_partitioned(root, columns=None, start=None, end=None, filters=None):
+    """
+    Load the rows of a partitioned dataset with start <= date <= end whose
+    `filters` columns hold one of the given values, e.g.
+    filters={'customer_region': ['North', 'South']}. Only parts the manifest
+    can't rule out are read, and only the needed columns of them.
+    """
+    manifest = read_manifest(root)
+    date_column = manifest['date_column']
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    filters = {column: _as_list(wanted) for column, wanted in (filters or {}).items()}
+    parts = select_parts(manifest, start, end, filters)
+    wanted = list(manifest['columns'] if columns is None else columns)
+    read = list(wanted)
+    for column in ([date_column] if start is not None or end is not None else []) + list(filters):
+        if column not in read:
+            read.append(column)
+
+    frames = []
+    for part in parts:
+        df = load_dataset(os.path.join(root, part['path']), columns=read)
+        keep = np.ones(len(df), dtype=bool)
+        # Only parts on the edge of the range need their rows checked
+        if ((start is not None and pd.Timestamp(part['min'][date_column]) < start) or
+                (end is not None and pd.Timestamp(part['max'][date_column]) > end)):
+            dates = df[date_column]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                # CSV parts read dates back as text
+                dates = pd.to_datetime(dates)
+            if start is not None:
+                keep &= (dates >= start).to_numpy()
+            if end is not None:
+                keep &= (dates <= end).to_numpy()
+        for column, values in filters.items():
+            keep &= df[column].isin(values).to_numpy()
+        frames.append(df[keep] if not keep.all() else df)
+    if not frames:
+        return pd.DataFrame(columns=wanted)
+
+    # Parts have their own categories; combine them back into one, without
+    # the values the filters removed
+    categorical = [column for column in wanted
+                   if any(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames)]
+    df = pd.concat(frames, ignore_index=True)[wanted]
+    for column in categorical:
+        df[column] = df[column].astype('category').cat.remove_unused_categories()
+    return df
@@ -0,0 +1,183 @@
+import argparse
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, HashingVectorizer
+
+from storage import load_dataset
+
+# Words of two or more letters, no digits
+TOKEN_PATTERN = r"(?u)\b[^\W\d_]{2,}\b"
+NEGATIONS = ['not', 'never', 'no']
+LEXICON = {
+    'excellent': 2, 'amazing': 2, 'love': 2, 'perfect': 2, 'fantastic': 2, 'outstanding': 2,
+    'great': 1.5, 'good': 1, 'nice': 1, 'happy': 1, 'satisfied': 1, 'recommend': 1,
+    'fast': 0.5, 'easy': 0.5, 'helpful': 1, 'friendly': 1, 'quality': 0.5, 'works': 0.5,
+    'terrible': -2, 'awful': -2, 'horrible': -2, 'worst': -2, 'hate': -2, 'useless': -2,
+    'bad': -1.5, 'poor': -1, 'broken': -1.5, 'disappointed': -1.5, 'slow': -1, 'late': -1,
+    'expensive': -0.5, 'difficult': -1, 'refund': -1, 'return': -0.5, 'rude': -1.5, 'damaged': -1.5,
+}
+
+
+class TextResult:
+    """Per-row sentiment scores plus per-group sentiment and keywords."""
+
+    def __init__(self, scores, sentiment, keywords, seconds):
+        self.scores = scores
+        self.sentiment = sentiment
+        self.keywords = keywords
+        self.seconds = seconds
+        self.rows_per_sec = len(scores) / seconds if seconds else float('inf')
+
+
+class TextAnalyzer:
+    """
+    Lexicon sentiment and keyword extraction over hashed sparse features.
+
+    Texts are turned into unigram+bigram counts by a HashingVectorizer, one
+    batch at a time. A row's sentiment is the sum of its lexicon scores,
+    with "not good" and the like counting as the opposite of "good": the
+    negated bigrams carry twice the negative score, which cancels the
+    unigram. Keyword counts are summed per group as sparse rows, so memory
+    doesn't grow with the number of rows.
+    """
+
+    def __init__(self, lexicon=LEXICON, n_features=2**20, batch_size=50_000, top_n=10,
+                 group_columns=('product_category', 'rating')):
+        self.batch_size = batch_size
+        self.top_n = top_n
+        self.group_columns = list(group_columns)
+        self.vectorizer = HashingVectorizer(n_features=n_features, token_pattern=TOKEN_PATTERN,
+                                            ngram_range=(1, 2), alternate_sign=False, norm=None)
+        # The same hashing the vectorizer applies to each term
+        self.hasher = FeatureHasher(n_features=n_features, input_type='string',
+                                    alternate_sign=False)
+
+        terms = list(lexicon) + [f'{negation} {word}' for negation in NEGATIONS for word in lexicon]
+        scores = list(lexicon.values()) + [-2 * score for _ in NEGATIONS for score in lexicon.values()]
+        self.weights = np.zeros(n_features)
+        np.add.at(self.weights, self.term_columns(terms), scores)
+
+    def term_columns(self, terms):
+        """Feature column of every term."""
+        return self.hasher.transform([[term] for term in terms]).tocsr().indices
+
+    def score_batch(self, batch):
+        """
+        Score one batch. Returns (scores, sentiment, counts, vocabulary):
+        sentiment maps group column -> {label: [score sum, rows]}, counts maps
+        group column -> {label: summed feature row} and vocabulary maps the
+        feature column of every word seen to the word.
+        """
+        # Feedback repeats a lot, so every distinct text is vectorized once.
+        # Missing texts get code -1, which picks the appended empty row.
+        text_codes, texts = pd.factorize(batch['feedback_text'])
+        texts = pd.Series(np.asarray(texts, dtype=object))
+        has_text = text_codes >= 0
+        features = sparse.vstack([self.vectorizer.transform(texts),
+                                  sparse.csr_matrix((1, self.weights.size))]).tocsr()[text_codes]
+        scores = features @ self.weights
+
+        sentiment, counts = {}, {}
+        for column in self.group_columns:
+            codes, labels = pd.factorize(batch[column])
+            rows = np.flatnonzero((codes >= 0) & has_text)
+            membership = sparse.csr_matrix((np.ones(len(rows)), (codes[rows], rows)),
+                                           shape=(len(labels), len(batch)))
+            label_scores = membership @ scores
+            label_rows = np.asarray(membership.sum(axis=1)).ravel()
+            label_counts = (membership @ features).tocsr()
+            sentiment[column] = {label: [label_scores[i], label_rows[i]]
+                                 for i, label in enumerate(labels)}
+            counts[column] = {label: label_counts[i] for i, label in enumerate(labels)}
+
+        words = texts.str.lower().str.findall(TOKEN_PATTERN).explode().dropna().unique()
+        vocabulary = dict(zip(self.term_columns(words), words))
+        return scores, sentiment, counts, vocabulary
+
+    def _batches(self, df):
+        # Project once: df[columns] inside the loop would copy all rows per batch
+        projected = df[['feedback_text'] + self.group_columns]
+        for start in range(0, len(projected), self.batch_size):
+            yield projected.iloc[start:start + self.batch_size]
+
+    def analyze(self, df, workers=None):
+        """
+        Score every row of df in batches, in `workers` processes if given.
+        Batches are merged in order, so the result doesn't depend on workers.
+        """
+        start = time.perf_counter()
+        if workers and workers > 1:
+            with Pool(workers, initializer=_init_worker, initargs=(self,)) as pool:
+                results = list(pool.imap(_score_in_worker, self._batches(df)))
+        else:
+            results = [self.score_batch(batch) for batch in self._batches(df)]
+
+        scores = np.concatenate([r[0] for r in results]) if results else np.empty(0)
+        sentiment = {column: {} for column in self.group_columns}
+        counts = {column: {} for column in self.group_columns}
+        vocabulary = {}
+        for _, batch_sentiment, batch_counts, batch_vocabulary in results:
+            for column in self.group_columns:
+                for label, (score_sum, rows) in batch_sentiment[column].items():
+                    total = sentiment[column].setdefault(label, [0.0, 0])
+                    total[0] += score_sum
+                    total[1] += rows
+                for label, row in batch_counts[column].items():
+                    previous = counts[column].get(label)
+                    counts[column][label] = row if previous is None else previous + row
+            vocabulary.update(batch_vocabulary)
+
+        sentiment_tables = {}
+        for column, totals in sentiment.items():
+            table = pd.DataFrame.from_dict(totals, orient='index', columns=['score_sum', 'rows'])
+            table['rows'] = table['rows'].astype('int64')
+            table['mean_sentiment'] = table['score_sum'] / table['rows'].where(table['rows'] > 0)
+            sentiment_tables[column] = table[['mean_sentiment', 'rows']].sort_index() \
+                .rename_axis(column)
+        keywords = {column: {label: self._top_keywords(row, vocabulary)
+                             for label, row in sorted(group_counts.items())}
+                    for column, group_counts in counts.items()}
+        return TextResult(pd.Series(scores, index=df.index, name='sentiment'),
+                          sentiment_tables, keywords, time.perf_counter() - start)
+
+    def _top_keywords(self, row, vocabulary):
+        """
+        The top_n most frequent known words of a summed feature row. Ties
+        are broken by word, so the result doesn't depend on the batching.
+        """
+        keywords = []
+        for column, count in zip(row.indices, row.data):
+            # Bigrams and stop words have no entry / are skipped
+            word = vocabulary.get(column)
+            if word is not None and word not in ENGLISH_STOP_WORDS:
+                keywords.append((word, int(count)))
+        return sorted(keywords, key=lambda keyword: (-keyword[1], keyword[0]))[:self.top_n]
+
+
+_worker_analyzer = None
+
+
+def _init_worker(analyzer):
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+
+def _score_in_worker(batch):
+    return _worker_analyzer.score_batch(batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score feedback text and report throughput")
+    parser.add_argument('path', help="cleaned dataset (CSV, Parquet or Feather)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: this process only)")
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    args = parser.parse_args()
+
+    df = load_dataset(args.path, columns=['feedback_text', 'product_category', 'rating'])
+    result = TextAnalyzer(batch_size=args.batch_size).analyze(df, workers=args.workers)
+    print(f"Scored {len(df)} rows in {result.seconds:.2f}s ({result.rows_per_sec:,.0f} rows/sec)")
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import SummaryState
+from sketches import Tails
+
+
+def _purchases(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'product_category': rng.choice(['Books', 'Toys'], n),
+        'purchase_amount': np.round(rng.standard_t(5, n) * 20 + 100, 2),
+    })
+
+
+def test_state_fliers_are_exact_beyond_the_sketch_size():
+    df = _purchases(200_000)
+    state = SummaryState()
+    for start in range(0, len(df), 30_000):
+        state.update(df.iloc[start:start + 30_000])
+    for stats in state.aggregates().purchase_by_category:
+        amounts = df.loc[df['product_category'] == stats['label'], 'purchase_amount'].to_numpy()
+        inside = amounts[(amounts >= stats['whislo']) & (amounts <= stats['whishi'])]
+        assert not stats['sampled']
+        assert stats['whislo'] == inside.min() and stats['whishi'] == inside.max()
+        np.testing.assert_array_equal(
+            stats['fliers'], np.sort(amounts[(amounts < stats['whislo']) | (amounts > stats['whishi'])]))
+
+
+def test_fliers_are_marked_sampled_past_the_tail_size():
+    df = _purchases(20_000)
+    state = SummaryState()
+    state.purchase_tails = {category: Tails(k=10) for category in ['Books', 'Toys']}
+    state.update(df)
+    assert all(stats['sampled'] for stats in state.aggregates().purchase_by_category)
+
+
+def test_tails_merge_matches_update():
+    values = np.random.default_rng(1).normal(size=5000)
+    merged = Tails(k=100).update(values[:2000]).merge(Tails(k=100).update(values[2000:]))
+    np.testing.assert_array_equal(merged.low, np.sort(values)[:100])
+    np.testing.assert_array_equal(merged.high, np.sort(values)[-100:])
+    assert merged.count == 5000
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from dedup import Deduplicator, row_digests
+
+
+def test_large_integers_keep_full_precision():
+    # 2**60 and 2**60 + 1 are the same float64
+    chunk = pd.DataFrame({'customer_id': [2**60, 2**60 + 1, 2**60 + 1]})
+    keep = Deduplicator().keep_mask(chunk)
+    assert keep.tolist() == [True, True, False]
+
+
+def test_int_and_float_chunks_agree():
+    ints = pd.DataFrame({'customer_id': [1, 2**60], 'rating': [4, 5]})
+    floats = pd.DataFrame({'customer_id': [1.0, np.nan], 'rating': [4.0, 5.5]})
+    nullable = pd.DataFrame({'customer_id': pd.array([1, None], dtype='Int64'),
+                             'rating': [4, 5]})
+    assert (row_digests(ints)[:1] == row_digests(floats)[:1]).all()
+    assert (row_digests(ints)[:1] == row_digests(nullable)[:1]).all()
+    assert row_digests(floats)[1] != row_digests(nullable)[1]
+
+
+def test_matches_drop_duplicates_across_chunks():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'customer_id': rng.integers(2**62, 2**62 + 50, 5000),
+        'purchase_amount': rng.choice([np.nan, 10.0, 10.5, 99.99], 5000),
+        'product_category': rng.choice(['Books', 'Toys', None], 5000),
+    })
+    deduplicator = Deduplicator(max_memory=8 * 64)
+    kept = pd.concat([deduplicator.deduplicate(df.iloc[start:start + 700])
+                      for start in range(0, len(df), 700)])
+    deduplicator.close()
+    pd.testing.assert_frame_equal(kept, df.drop_duplicates())
@@ -2,8 +2,8 @@
 Medical Data Extraction Package
 """
 
-from .extractor import MedicalDataExtractor
-from .utils import clean_text, extract_medical_entities, validate_medical_data
+from .extractor import PROFILES, MedicalDataExtractor, measure_throughput
+from .utils import EntityMatcher, clean_text, extract_medical_entities, validate_medical_data
 
 __version__ = "0.1.0"
-__all__ = ["MedicalDataExtractor", "clean_text", "extract_medical_entities", "validate_medical_data"] 
\ No newline at end of file
+__all__ = ["PROFILES", "MedicalDataExtractor", "measure_throughput", "EntityMatcher", "clean_text", "extract_medical_entities", "validate_medical_data"] 
\ No newline at end of file
@@ -1,23 +1,65 @@
 import spacy
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import logging
-from .utils import clean_text, extract_medical_entities
+import queue
+import threading
+import time
+from .utils import EntityMatcher, clean_text, extract_medical_entities
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# spaCy pipeline profiles: the en_core_web_sm components each one leaves
+# out, or None for no statistical model at all. Profiles without a parser
+# split sentences with the rule-based sentencizer.
+PROFILES: Dict[str, Optional[List[str]]] = {
+    "full": [],
+    "ner-only": ["tagger", "parser", "attribute_ruler", "lemmatizer"],
+    "regex-only": None,
+}
+
 class MedicalDataExtractor:
-    def __init__(self):
-        """Initialize the MedicalDataExtractor with spaCy model."""
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("Successfully loaded spaCy model")
-        except OSError:
-            logger.error("Please download the spaCy model first: python -m spacy download en_core_web_sm")
-            raise
+    def __init__(self, matcher: Optional[EntityMatcher] = None, profile: str = "full"):
+        """
+        Initialize the MedicalDataExtractor with spaCy model.
+        
+        Args:
+            matcher (Optional[EntityMatcher]): Entity matcher, e.g. one built
+                with a full formulary (default: the built-in vocabularies)
+            profile (str): Pipeline profile: "full" runs the whole model,
+                "ner-only" only its named entity recognizer and "regex-only"
+                just the tokenizer and the entity matcher
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}, expected one of {list(PROFILES)}")
+        self.profile = profile
+        # Compiled once, reused for every document
+        self.matcher = matcher or EntityMatcher()
+        self.nlp = self._load_pipeline(profile)
+
+    @staticmethod
+    def _load_pipeline(profile: str) -> "spacy.language.Language":
+        """Load the spaCy pipeline of a profile."""
+        excluded = PROFILES[profile]
+        if excluded is None:
+            nlp = spacy.blank("en")
+        else:
+            try:
+                nlp = spacy.load("en_core_web_sm", exclude=excluded)
+                logger.info("Successfully loaded spaCy model")
+            except OSError:
+                logger.error("Please download the spaCy model first: python -m spacy download en_core_web_sm")
+                raise
+            # The shared embedding layer is only needed by components listening to it
+            if "tok2vec" in nlp.pipe_names and not nlp.get_pipe("tok2vec").listening_components:
+                nlp.remove_pipe("tok2vec")
+        if "parser" not in nlp.pipe_names:
+            nlp.add_pipe("sentencizer")
+        logger.info(f"Using the {profile} profile: {nlp.pipe_names}")
+        return nlp
 
     def extract_from_text(self, text: str) -> Dict[str, Any]:
         """
@@ -35,12 +77,16 @@ class MedicalDataExtractor:
         # Process with spaCy
         doc = self.nlp(cleaned_text)
         
+        return self._result_from_doc(doc)
+
+    def _result_from_doc(self, doc) -> Dict[str, Any]:
+        """Build the result dictionary of a processed (cleaned) text."""
         # Extract medical entities
-        entities = extract_medical_entities(doc)
+        entities = extract_medical_entities(doc, self.matcher)
         
         return {
             "entities": entities,
-            "processed_text": cleaned_text,
+            "processed_text": doc.text,
             "sentence_count": len(list(doc.sents)),
             "word_count": len([token for token in doc if not token.is_punct])
         }
@@ -63,31 +109,122 @@ class MedicalDataExtractor:
             logger.error(f"Error processing file {file_path}: {str(e)}")
             raise
 
-    def batch_process(self, directory: str) -> pd.DataFrame:
+    def _read_files(self, paths: List[Path], prefetch: int) -> Iterator[Tuple[str, Path]]:
+        """
+        Read and clean files in a background thread, up to `prefetch` files
+        ahead of the consumer, so disk I/O overlaps with inference.
+        
+        Args:
+            paths (List[Path]): Files to read, in order
+            prefetch (int): Maximum number of files read ahead
+            
+        Yields:
+            Tuple[str, Path]: Cleaned text and path of every readable file, in order
+        """
+        buffer: queue.Queue = queue.Queue(maxsize=max(prefetch, 1))
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            # Give up once the consumer has stopped, instead of blocking forever
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader():
+            for path in paths:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        item = (clean_text(f.read()), path, None)
+                except Exception as e:
+                    item = (None, path, e)
+                if not put(item):
+                    return
+            put(done)
+
+        thread = threading.Thread(target=reader, name="medical-file-reader", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    break
+                text, path, error = item
+                if error is not None:
+                    logger.error(f"Error processing {path}: {str(error)}")
+                    continue
+                yield text, path
+        finally:
+            stop.set()
+            thread.join()
+
+    def batch_process(self, directory: str, batch_size: int = 64, n_process: int = 1,
+                      prefetch: int = 256) -> pd.DataFrame:
         """
         Process multiple files in a directory.
         
+        Files are read ahead by a background thread and streamed through
+        `nlp.pipe`, so spaCy batches the documents and can spread them over
+        several processes. Results keep the (sorted) order of the files.
+        
         Args:
             directory (str): Path to directory containing medical data files
+            batch_size (int): Number of documents spaCy processes together
+            n_process (int): Number of worker processes (-1 for all CPUs)
+            prefetch (int): Maximum number of files read ahead of inference
             
         Returns:
             pd.DataFrame: DataFrame containing extracted information from all files
         """
-        results = []
         directory_path = Path(directory)
+        paths = sorted(path for path in directory_path.glob("**/*") if path.is_file())
+        texts = self._read_files(paths, prefetch)
         
-        for file_path in directory_path.glob("**/*"):
-            if file_path.is_file():
-                try:
-                    result = self.process_file(str(file_path))
-                    result["file_name"] = file_path.name
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"Error processing {file_path}: {str(e)}")
-                    continue
+        results = []
+        for doc, file_path in self.nlp.pipe(texts, as_tuples=True, batch_size=batch_size,
+                                            n_process=n_process):
+            try:
+                result = self._result_from_doc(doc)
+            except Exception as e:
+                logger.error(f"Error processing {file_path}: {str(e)}")
+                continue
+            result["file_name"] = file_path.name
+            results.append(result)
         
+        logger.info(f"Processed {len(results)} of {len(paths)} files")
         return pd.DataFrame(results)
 
+def measure_throughput(texts: List[str], profiles: Optional[List[str]] = None,
+                       batch_size: int = 64) -> Dict[str, float]:
+    """
+    Measure the throughput of pipeline profiles.
+    
+    Args:
+        texts (List[str]): Documents to process with every profile
+        profiles (Optional[List[str]]): Profiles to measure (default: all)
+        batch_size (int): Number of documents spaCy processes together
+        
+    Returns:
+        Dict[str, float]: Documents per second of every profile that could be loaded
+    """
+    throughput = {}
+    cleaned = [clean_text(text) for text in texts]
+    for profile in profiles or list(PROFILES):
+        try:
+            extractor = MedicalDataExtractor(profile=profile)
+        except OSError:
+            logger.warning(f"Skipping the {profile} profile: its model isn't installed")
+            continue
+        start = time.perf_counter()
+        for doc in extractor.nlp.pipe(cleaned, batch_size=batch_size):
+            extractor._result_from_doc(doc)
+        throughput[profile] = len(cleaned) / (time.perf_counter() - start)
+    return throughput
+
 def main():
     """Main function to demonstrate usage."""
     extractor = MedicalDataExtractor()
@@ -107,5 +244,10 @@ def main():
     print(f"Sentence Count: {result['sentence_count']}")
     print(f"Word Count: {result['word_count']}")
 
+    print("\nProfile Throughput:")
+    print("-------------------")
+    for profile, docs_per_second in measure_throughput([sample_text] * 1000).items():
+        print(f"{profile}: {docs_per_second:,.0f} documents/second")
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,7 +1,20 @@
 import re
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, Iterable, List, Any, Optional
 from spacy.tokens import Doc
 
+# Placeholder for any whole number inside a vocabulary term
+NUMBER = "{number}"
+
+CONDITION_TERMS = [
+    "hypertension", "diabetes", "fever", "cough", "fatigue", "pain",
+    f"type {NUMBER} diabetes", "high blood pressure",
+]
+
+MEDICATION_TERMS = ["amoxicillin", "aspirin", "ibuprofen", "paracetamol", "mg", "g", "ml"]
+
+MEASUREMENT_PATTERN = r'\d+(?:\.\d+)?\s*(?:°[CF]|(?:mg|g|ml|L)|(?:mmHg|bpm))'
+
 def clean_text(text: str) -> str:
     """
     Clean and normalize input text.
@@ -23,12 +36,126 @@ def clean_text(text: str) -> str:
     
     return text
 
-def extract_medical_entities(doc: Doc) -> Dict[str, List[str]]:
+def _term_atoms(term: str) -> List[str]:
+    """Split a vocabulary term into regex atoms: characters, whitespace and numbers."""
+    atoms = []
+    for i, word in enumerate(term.lower().split()):
+        if i:
+            atoms.append(r'\s+')
+        if word == NUMBER:
+            atoms.append(r'\d+')
+        else:
+            atoms.extend(re.escape(char) for char in word)
+    return atoms
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Build a regex matching any of `terms`, with common prefixes shared as
+    in a trie. Matching then costs time in proportion to the length of the
+    text, not the number of terms.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for atom in _term_atoms(term):
+            node = node.setdefault(atom, {})
+        node[""] = {}
+
+    def pattern(node: Dict[str, dict]) -> str:
+        branches = [atom + pattern(child) for atom, child in sorted(node.items()) if atom]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A term ends here; continue greedily to longer terms if possible
+            body = (body if len(branches) > 1 else "(?:" + body + ")") + "?"
+        return body
+
+    # (?!) never matches, for an empty vocabulary
+    return pattern(trie) or "(?!)"
+
+
+class EntityMatcher:
+    """
+    Tags conditions, medications and measurements in a single scan.
+
+    The vocabularies are compiled once into one regular expression with a
+    named group per entity type, each vocabulary shaped as a trie. It
+    scales to vocabularies of tens of thousands of terms (e.g. a full
+    formulary) with no slowdown per term. Terms match whole words,
+    case-insensitively, with any whitespace between their words; the
+    NUMBER placeholder matches any whole number. Matches may overlap, so
+    "type 2 diabetes" yields both "type 2 diabetes" and "diabetes", and
+    each type is matched on its own. Where two terms of the same type start
+    at the same position, only the longer one is reported.
+    """
+
+    def __init__(self, conditions: Iterable[str] = CONDITION_TERMS,
+                 medications: Iterable[str] = MEDICATION_TERMS,
+                 measurement_pattern: str = MEASUREMENT_PATTERN):
+        """
+        Compile the matcher.
+        
+        Args:
+            conditions (Iterable[str]): Condition terms
+            medications (Iterable[str]): Medication terms and units
+            measurement_pattern (str): Regex for measurements such as "500 mg"
+        """
+        # Every part is a lookahead, so a match consumes nothing and the scan
+        # also finds matches starting inside earlier ones. The first one
+        # rejects positions where no type matches; each optional one after it
+        # then captures its own type, so types starting at the same position
+        # are all found.
+        measurements = rf'(?:{measurement_pattern})'
+        conditions = rf'\b(?:{_trie_pattern(conditions)})\b'
+        medications = rf'\b(?:{_trie_pattern(medications)})\b'
+        self.pattern = re.compile(
+            rf'(?={measurements}|{conditions}|{medications})'
+            rf'(?=(?P<measurements>{measurements}))?'
+            rf'(?=(?P<conditions>{conditions}))?'
+            rf'(?=(?P<medications>{medications}))?',
+            re.IGNORECASE)
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """
+        Find all entities in text.
+        
+        Args:
+            text (str): Text to scan
+            
+        Returns:
+            Dict[str, List[str]]: Matched strings by entity type, in text order
+        """
+        entities: Dict[str, List[str]] = {"conditions": [], "medications": [], "measurements": []}
+        measurement_end = 0
+        for match in self.pattern.finditer(text):
+            for entity_type, matches in entities.items():
+                start, end = match.span(entity_type)
+                if start < 0:
+                    continue
+                if entity_type == "measurements":
+                    # A measurement's own digits would match again as shorter ones
+                    if start < measurement_end:
+                        continue
+                    measurement_end = end
+                matches.append(text[start:end])
+        return entities
+
+
+@lru_cache(maxsize=None)
+def _default_matcher() -> EntityMatcher:
+    return EntityMatcher()
+
+
+def extract_medical_entities(doc: Doc, matcher: Optional[EntityMatcher] = None) -> Dict[str, List[str]]:
     """
     Extract medical entities from spaCy processed document.
     
     Args:
         doc (Doc): spaCy processed document
+        matcher (Optional[EntityMatcher]): Compiled matcher to use (default: the
+            built-in vocabularies, compiled once)
         
     Returns:
         Dict[str, List[str]]: Dictionary of medical entities by type
@@ -41,43 +168,10 @@ def extract_medical_entities(doc: Doc) -> Dict[str, List[str]]:
         "other": []
     }
     
-    # Medical condition patterns
-    condition_patterns = [
-        r'\b(?:hypertension|diabetes|fever|cough|fatigue|pain)\b',
-        r'\b(?:type\s+\d+\s+diabetes)\b',
-        r'\b(?:high\s+blood\s+pressure)\b'
-    ]
-    
-    # Medication patterns
-    medication_patterns = [
-        r'\b(?:Amoxicillin|Aspirin|Ibuprofen|Paracetamol)\b',
-        r'\b(?:mg|g|ml)\b'
-    ]
-    
-    # Measurement patterns
-    measurement_patterns = [
-        r'\d+(?:\.\d+)?\s*°[CF]',
-        r'\d+(?:\.\d+)?\s*(?:mg|g|ml|L)',
-        r'\d+(?:\.\d+)?\s*(?:mmHg|bpm)'
-    ]
-    
-    # Extract entities based on patterns
-    text = doc.text.lower()
-    
-    # Extract conditions
-    for pattern in condition_patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        entities["conditions"].extend(match.group() for match in matches)
-    
-    # Extract medications
-    for pattern in medication_patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        entities["medications"].extend(match.group() for match in matches)
-    
-    # Extract measurements
-    for pattern in measurement_patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        entities["measurements"].extend(match.group() for match in matches)
+    # Tag conditions, medications and measurements in one scan
+    matcher = matcher or _default_matcher()
+    for entity_type, matches in matcher.match(doc.text.lower()).items():
+        entities[entity_type].extend(matches)
     
     # Extract named entities from spaCy
     for ent in doc.ents:
@@ -92,7 +186,7 @@ def extract_medical_entities(doc: Doc) -> Dict[str, List[str]]:
     
     # Remove duplicates and sort
     for key in entities:
-        entities[key] = sorted(list(set(entities[key])))
+        entities[key] = sorted(set(entities[key]))
     
     return entities
 
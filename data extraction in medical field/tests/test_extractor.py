@@ -0,0 +1,42 @@
+"""
+Tests for src.extractor, with the regex-only profile so no model is needed.
+"""
+
+import logging
+
+from src.extractor import MedicalDataExtractor
+
+
+class FailingMatcher:
+    """Entity matcher that fails on any text mentioning "corrupt"."""
+
+    def __init__(self, extractor: MedicalDataExtractor):
+        self.matcher = extractor.matcher
+
+    def match(self, text):
+        if "corrupt" in text:
+            raise ValueError("cannot match this text")
+        return self.matcher.match(text)
+
+
+def test_batch_process_keeps_file_order(tmp_path):
+    for i in range(12):
+        (tmp_path / f"note-{i:02d}.txt").write_text(f"Fever of 38.{i}°C", encoding="utf-8")
+    results = MedicalDataExtractor(profile="regex-only").batch_process(str(tmp_path), batch_size=5)
+    assert results["file_name"].tolist() == [f"note-{i:02d}.txt" for i in range(12)]
+    assert results["entities"][3]["measurements"] == ["38.3°c"]
+
+
+def test_batch_process_skips_failing_documents(tmp_path, caplog):
+    (tmp_path / "a.txt").write_text("Patient has a fever.", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("corrupt record", encoding="utf-8")
+    (tmp_path / "c.txt").write_bytes(b"\xff\xfe not utf-8")
+    (tmp_path / "d.txt").write_text("Took 500 mg aspirin.", encoding="utf-8")
+    extractor = MedicalDataExtractor(profile="regex-only")
+    extractor.matcher = FailingMatcher(extractor)
+
+    with caplog.at_level(logging.ERROR):
+        results = extractor.batch_process(str(tmp_path))
+
+    assert results["file_name"].tolist() == ["a.txt", "d.txt"]
+    assert "b.txt" in caplog.text and "c.txt" in caplog.text
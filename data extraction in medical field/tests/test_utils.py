@@ -0,0 +1,132 @@
+"""
+Tests for src.utils.
+
+EntityMatcher replaced a list of regexes per entity type, each run over the
+text on its own. The fuzz tests below keep the single-scan matcher equal to
+those original patterns, so vocabulary changes can't silently drift.
+"""
+
+import random
+import re
+from typing import Dict, List, Pattern
+
+import pytest
+import spacy
+from spacy.tokens import Span
+
+from src.utils import EntityMatcher, extract_medical_entities
+
+# The patterns extract_medical_entities used before EntityMatcher
+REFERENCE_PATTERNS = {
+    "conditions": [
+        r'\b(?:hypertension|diabetes|fever|cough|fatigue|pain)\b',
+        r'\b(?:type\s+\d+\s+diabetes)\b',
+        r'\b(?:high\s+blood\s+pressure)\b',
+    ],
+    "medications": [
+        r'\b(?:Amoxicillin|Aspirin|Ibuprofen|Paracetamol)\b',
+        r'\b(?:mg|g|ml)\b',
+    ],
+    "measurements": [
+        r'\d+(?:\.\d+)?\s*°[CF]',
+        r'\d+(?:\.\d+)?\s*(?:mg|g|ml|L)',
+        r'\d+(?:\.\d+)?\s*(?:mmHg|bpm)',
+    ],
+}
+
+# Terms, near misses, units and filler, joined at random into texts
+FUZZ_WORDS = [
+    "fever", "Fever", "cough", "type 2 diabetes", "type  12 diabetes", "type x diabetes",
+    "diabetes", "diabetes2", "high blood pressure", "high-blood pressure",
+    "HIGH\tBLOOD PRESSURE", "pain", "painful", "Amoxicillin", "aspirin,", "ibuprofen.",
+    "500mg", "500 mg", "12.5 ML", "5 mmHg", "120 bpm", "38.5°C", "38.5 °f", "3 L",
+    "2 glasses", "5 g", "g", "mg", "ml", "x500mg", "1.5.2 mg", "0.5mg/kg", "the", "and",
+    "patient", ".", ",", "(", ")", "3 liters", "99 mmhg", "7 days", "100mmhg",
+]
+
+
+@pytest.fixture(scope="module")
+def nlp():
+    return spacy.blank("en")
+
+
+def compile_patterns(patterns: Dict[str, List[str]]) -> Dict[str, List[Pattern]]:
+    return {entity_type: [re.compile(pattern, re.IGNORECASE) for pattern in type_patterns]
+            for entity_type, type_patterns in patterns.items()}
+
+
+def reference_entities(text: str, patterns: Dict[str, List[Pattern]]) -> Dict[str, List[str]]:
+    """Apply every pattern on its own, as the original implementation did."""
+    text = text.lower()
+    return {
+        entity_type: sorted({match.group() for pattern in type_patterns
+                             for match in pattern.finditer(text)})
+        for entity_type, type_patterns in patterns.items()
+    }
+
+
+def term_pattern(term: str) -> str:
+    """One term as a standalone regex, in the style of the original patterns."""
+    return r'\b' + r'\s+'.join(re.escape(word) for word in term.split()) + r'\b'
+
+
+def fuzz_texts(words: List[str], n_texts: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(1, 25)))
+            for _ in range(n_texts)]
+
+
+def test_extract_medical_entities_matches_original_patterns(nlp):
+    patterns = compile_patterns(REFERENCE_PATTERNS)
+    for text in fuzz_texts(FUZZ_WORDS, 5000):
+        entities = extract_medical_entities(nlp(text))
+        expected = reference_entities(text, patterns)
+        for entity_type, matches in expected.items():
+            assert entities[entity_type] == matches, text
+
+
+def test_overlapping_matches_are_all_found(nlp):
+    entities = extract_medical_entities(nlp("Type 2 diabetes, 500 mg Aspirin, 38.5°C"))
+    assert entities["conditions"] == ["diabetes", "type 2 diabetes"]
+    assert entities["medications"] == ["aspirin", "mg"]
+    assert entities["measurements"] == ["38.5°c", "500 mg"]
+
+
+def test_large_vocabulary_matches_alternation():
+    rng = random.Random(2)
+    letters = "abcdefgh"
+    conditions = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(1, 6)))
+                         for _ in range(2000)})
+    medications = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(2, 5)))
+                          + " " + "".join(rng.choice(letters) for _ in range(3))
+                          for _ in range(500)})
+    matcher = EntityMatcher(conditions, medications, r'\d+\s*mg')
+    patterns = compile_patterns({
+        "conditions": [term_pattern(term) for term in conditions],
+        "medications": [term_pattern(term) for term in medications],
+        "measurements": [r'\d+\s*mg'],
+    })
+    words = conditions[:200] + medications[:100] + ["ab cd", "10 mg", "x", "-", "."]
+    for text in fuzz_texts(words, 500, seed=3):
+        matches = {entity_type: sorted(set(found))
+                   for entity_type, found in matcher.match(text.lower()).items()}
+        assert matches == reference_entities(text, patterns), text
+
+
+def test_spacy_entities_are_mapped_by_label(nlp):
+    doc = nlp("Patient had an appendectomy for asthma with Lisinopril in Boston")
+    labels = {"appendectomy": "PROCEDURE", "asthma": "DISEASE", "Lisinopril": "DRUG",
+              "Boston": "GPE"}
+    doc.ents = [Span(doc, token.i, token.i + 1, label=labels[token.text])
+                for token in doc if token.text in labels]
+    entities = extract_medical_entities(doc)
+    assert entities["procedures"] == ["appendectomy"]
+    assert entities["conditions"] == ["asthma"]
+    assert entities["medications"] == ["Lisinopril"]
+    assert entities["other"] == ["Boston"]
+
+
+def test_empty_vocabulary_matches_nothing():
+    matcher = EntityMatcher(conditions=[], medications=[])
+    assert matcher.match("fever 500 mg") == {"conditions": [], "medications": [],
+                                             "measurements": ["500 mg"]}